@@ -0,0 +1,315 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.utils import timezone
+from wagtail.admin.views.pages.bulk_actions.page_bulk_action import PageBulkAction
+from wagtail.models import COMMENTS_RELATION_NAME, Page, PageLogEntry, Revision
+
+from .changes import record_changes
+from .feed import deferred_feed_refresh, schedule_feed_refresh
+from .forms import (
+    MeetingDistrictForm,
+    MeetingLocationForm,
+    MeetingStatusForm,
+    MeetingTypeForm,
+)
+from .models import Meeting
+from .search import update_search_index
+
+BULK_BATCH_SIZE = 500
+
+
+def publish_meeting_changes(meeting_ids, update_draft, user=None):
+    """
+    Publish a change already made to the meetings' rows, giving each meeting a
+    new revision of its updated state. Revisions, page pointers and log entries
+    are written a batch at a time rather than page by page.
+
+    A meeting with unpublished changes keeps them waiting: `update_draft` applies
+    the change to a copy of its draft's content, which becomes the new draft.
+    Its row, which is its live state, must be left alone (see `with_drafts`).
+    """
+    now = timezone.now()
+    content_type = ContentType.objects.get_for_model(Meeting)
+    base_content_type = ContentType.objects.get_for_model(Page)
+    meeting_ids = list(meeting_ids)
+
+    for start in range(0, len(meeting_ids), BULK_BATCH_SIZE):
+        meetings = list(
+            Meeting.objects.filter(pk__in=meeting_ids[start : start + BULK_BATCH_SIZE])
+            .select_related("group", "latest_revision")
+            .prefetch_related("types", COMMENTS_RELATION_NAME)
+        )
+
+        publishing = [
+            meeting.live and not meeting.has_unpublished_changes
+            for meeting in meetings
+        ]
+        revisions = []
+        for meeting, publish in zip(meetings, publishing):
+            if publish or meeting.latest_revision is None:
+                content = meeting.serializable_data()
+            else:
+                content = update_draft(dict(meeting.latest_revision.content))
+
+            revisions.append(
+                Revision(
+                    content_type=content_type,
+                    base_content_type=base_content_type,
+                    object_id=str(meeting.pk),
+                    created_at=now,
+                    user=user,
+                    object_str=str(meeting),
+                    content=content,
+                )
+            )
+        Revision.objects.bulk_create(revisions)
+
+        pages = []
+        log_entries = []
+        for meeting, publish, revision in zip(meetings, publishing, revisions):
+            pages.append(
+                Page(
+                    pk=meeting.pk,
+                    latest_revision=revision,
+                    latest_revision_created_at=now,
+                    live_revision=revision if publish else meeting.live_revision,
+                    last_published_at=now if publish else meeting.last_published_at,
+                )
+            )
+            log_entries.append(
+                PageLogEntry(
+                    content_type=content_type,
+                    label=meeting.get_admin_display_title(),
+                    action="wagtail.publish" if publish else "wagtail.edit",
+                    timestamp=now,
+                    user=user,
+                    revision=revision,
+                    content_changed=True,
+                    page_id=meeting.pk,
+                )
+            )
+        Page.objects.bulk_update(
+            pages,
+            [
+                "latest_revision",
+                "latest_revision_created_at",
+                "live_revision",
+                "last_published_at",
+            ],
+        )
+        PageLogEntry.objects.bulk_create(log_entries)
+
+
+def with_drafts(meetings):
+    """
+    Narrow `meetings` to those with a draft, which `publish_meeting_changes`
+    changes without publishing.
+    """
+    return meetings.filter(
+        Q(live=False) | Q(has_unpublished_changes=True),
+        latest_revision__isnull=False,
+    )
+
+
+class MeetingBulkAction(PageBulkAction):
+    """
+    Base class for bulk actions that change a field of many Meeting pages at once.
+
+    The rows are updated in bulk and the change published as one transaction,
+    then the delta log and feed are brought up to date once, rather than once for
+    every page as editing and publishing each meeting would. None of the fields
+    these actions change are searched, so the search index is left alone.
+    """
+
+    template_name = "meeting_guide/admin/confirm_bulk_action.html"
+    action_priority = 60
+
+    def check_perm(self, page):
+        return (
+            issubclass(page.specific_class, Meeting)
+            and page.permissions_for_user(self.request.user).can_publish()
+        )
+
+    def get_execution_context(self):
+        return {**super().get_execution_context(), **self.cleaned_form.cleaned_data}
+
+    @classmethod
+    def update_meetings(cls, meetings, **kwargs):
+        """
+        Make the change to the meetings' rows. Meetings with a draft are not
+        passed in, as their rows hold what is live.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def update_content(cls, content, **kwargs):
+        """
+        Make the change to a copy of a meeting's revision content, and return it.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def execute_action(cls, objects, user=None, **kwargs):
+        meeting_ids = [page.pk for page in objects]
+        meetings = Meeting.objects.filter(pk__in=meeting_ids)
+
+        with deferred_feed_refresh():
+            cls.update_meetings(
+                meetings.exclude(pk__in=with_drafts(meetings)), **kwargs
+            )
+            publish_meeting_changes(
+                meeting_ids,
+                lambda content: cls.update_content(content, **kwargs),
+                user=user,
+            )
+            record_changes(meetings)
+            schedule_feed_refresh()
+
+        return len(meeting_ids), 0
+
+    def get_success_message(self, num_parent_objects, num_child_objects):
+        if num_parent_objects == 1:
+            return "1 meeting has been updated"
+        return f"{num_parent_objects} meetings have been updated"
+
+
+class SetStatusBulkAction(MeetingBulkAction):
+    display_name = "Set status"
+    action_type = "meeting_set_status"
+    aria_label = "Set the status of the selected meetings"
+    form_class = MeetingStatusForm
+
+    @classmethod
+    def update_meetings(cls, meetings, status=None, **kwargs):
+        meetings.update(status=status)
+
+    @classmethod
+    def update_content(cls, content, status=None, **kwargs):
+        content["status"] = status
+        return content
+
+
+class AddTypeBulkAction(MeetingBulkAction):
+    display_name = "Add type"
+    action_type = "meeting_add_type"
+    aria_label = "Add a type to the selected meetings"
+    form_class = MeetingTypeForm
+
+    @classmethod
+    def update_meetings(cls, meetings, meeting_type=None, **kwargs):
+        through = Meeting.types.through
+        typed = through.objects.filter(
+            meeting__in=meetings, meetingtype=meeting_type
+        ).values_list("meeting_id", flat=True)
+        through.objects.bulk_create(
+            [
+                through(meeting_id=pk, meetingtype=meeting_type)
+                for pk in meetings.exclude(pk__in=typed).values_list("pk", flat=True)
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+    @classmethod
+    def update_content(cls, content, meeting_type=None, **kwargs):
+        types = content.get("types") or []
+        if meeting_type.pk not in types:
+            content["types"] = types + [meeting_type.pk]
+        return content
+
+
+class RemoveTypeBulkAction(MeetingBulkAction):
+    display_name = "Remove type"
+    action_type = "meeting_remove_type"
+    aria_label = "Remove a type from the selected meetings"
+    form_class = MeetingTypeForm
+
+    @classmethod
+    def update_meetings(cls, meetings, meeting_type=None, **kwargs):
+        Meeting.types.through.objects.filter(
+            meeting__in=meetings, meetingtype=meeting_type
+        ).delete()
+
+    @classmethod
+    def update_content(cls, content, meeting_type=None, **kwargs):
+        content["types"] = [
+            pk for pk in content.get("types") or [] if pk != meeting_type.pk
+        ]
+        return content
+
+
+class SetDistrictBulkAction(MeetingBulkAction):
+    display_name = "Set district"
+    action_type = "meeting_set_district"
+    aria_label = "Set the district and area of the selected meetings"
+    form_class = MeetingDistrictForm
+
+    @classmethod
+    def get_values(cls, district="", area="", **kwargs):
+        return {
+            name: value
+            for name, value in (("district", district), ("area", area))
+            if value
+        }
+
+    @classmethod
+    def update_meetings(cls, meetings, **kwargs):
+        meetings.update(**cls.get_values(**kwargs))
+
+    @classmethod
+    def update_content(cls, content, **kwargs):
+        content.update(cls.get_values(**kwargs))
+        return content
+
+
+class MoveToLocationBulkAction(MeetingBulkAction):
+    """
+    Move meetings to another Location, for when a venue closes. Moving changes the
+    page tree, so each meeting is moved in turn, but the feed is still refreshed
+    once at the end. Meetings whose slug is taken at the new Location are left
+    where they are.
+    """
+
+    display_name = "Move to location"
+    action_type = "meeting_move_to_location"
+    aria_label = "Move the selected meetings to another location"
+    form_class = MeetingLocationForm
+
+    def check_perm(self, page):
+        return (
+            super().check_perm(page)
+            and page.permissions_for_user(self.request.user).can_move()
+        )
+
+    @classmethod
+    def execute_action(cls, objects, location=None, user=None, **kwargs):
+        moved_ids = []
+        skipped = 0
+        with deferred_feed_refresh():
+            for page in objects:
+                if page.get_parent().pk == location.pk:
+                    continue
+                if not Page._slug_is_available(page.slug, location, page=page) or (
+                    user is not None
+                    and not page.permissions_for_user(user).can_move_to(location)
+                ):
+                    skipped += 1
+                    continue
+
+                page.move(location, pos="last-child", user=user)
+                moved_ids.append(page.pk)
+
+            # Meetings are searched by their Location.
+            update_search_index(Meeting, moved_ids)
+
+        # Wagtail passes the second count on as child objects; here it is the
+        # meetings that could not be moved.
+        return len(moved_ids), skipped
+
+    def get_success_message(self, num_parent_objects, num_child_objects):
+        if num_parent_objects == 1:
+            message = "1 meeting has been moved"
+        else:
+            message = f"{num_parent_objects} meetings have been moved"
+        if num_child_objects:
+            message += f"; {num_child_objects} could not be moved"
+        return message
@@ -0,0 +1,286 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+
+from .settings import get_cache_stale_timeout, get_cache_timeout
+
+FEED_CACHE_PREFIX = "wagtail_meeting_guide_api_cache"
+FEED_VERSION_KEY = "wagtail_meeting_guide_api_version"
+FEED_DIRTY_KEY = "wagtail_meeting_guide_api_dirty"
+FEED_LOCK_KEY = "wagtail_meeting_guide_api_lock"
+FEED_LOCK_TIMEOUT = 60 * 10
+REGION_CACHE_PREFIX = "wagtail_meeting_guide_region_cache"
+REGION_VERSION_KEY = "wagtail_meeting_guide_region_version"
+MEETING_TYPE_VERSION_KEY = "wagtail_meeting_guide_meeting_type_version"
+
+# How long the lock on building a cached entry is held at most, how long a
+# request waits for another request to build an entry it has no current copy of,
+# and how often it checks for it.
+BUILD_LOCK_TIMEOUT = 60
+BUILD_WAIT = 3
+BUILD_WAIT_INTERVAL = 0.05
+
+
+def new_feed_version():
+    """
+    Seed a generation counter from the clock, so a counter that was evicted from
+    the cache never restarts below a version that may still have cached entries.
+    """
+    return int(time.time() * 1000)
+
+
+def get_version(version_key):
+    """
+    Return the current generation counter stored under `version_key`, shared by
+    every worker and node using the same cache backend.
+    """
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, new_feed_version(), None)
+        version = cache.get(version_key)
+
+    return version
+
+
+def bump_version(version_key):
+    """
+    Move the counter under `version_key` on to a new generation. Entries cached
+    under older versions are never read again and simply expire.
+    """
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        # The counter was evicted; start a fresh generation.
+        version = new_feed_version()
+        cache.set(version_key, version, None)
+        return version
+
+
+def get_feed_version():
+    """
+    Return the current generation of the meeting feed.
+    """
+    return get_version(FEED_VERSION_KEY)
+
+
+def bump_feed_version():
+    """
+    Move the feed on to a new generation.
+    """
+    return bump_version(FEED_VERSION_KEY)
+
+
+def get_feed_cache_key(*parts):
+    """
+    Build the cache key for an entry built from the feed's content. Entries are
+    stored with the feed version they were built for, see `cached_build`.
+    """
+    return ":".join([FEED_CACHE_PREFIX] + [str(part) for part in parts])
+
+
+def bump_region_version():
+    """
+    Move the region tree on to a new generation. Only Region changes do this, so
+    the tree stays cached while meetings come and go.
+    """
+    return bump_version(REGION_VERSION_KEY)
+
+
+def get_region_cache_key(*parts):
+    """
+    Build the cache key for an entry built from the region tree. Entries are
+    stored with the region version they were built for, see `cached_build`.
+    """
+    return ":".join([REGION_CACHE_PREFIX] + [str(part) for part in parts])
+
+
+def store_cached(key, value, version=None):
+    """
+    Cache `value` under `key`, built for `version`, along with the time it stops
+    being fresh and the later time it can no longer be served even stale.
+    """
+    fresh_until = time.time() + get_cache_timeout()
+    stale_until = fresh_until + get_cache_stale_timeout()
+    cache.set(
+        key,
+        (value, version, fresh_until, stale_until),
+        get_cache_timeout() + get_cache_stale_timeout(),
+    )
+    return value
+
+
+def rebuild_cached(key, build, version_key=None):
+    """
+    Build a value and cache it under `key`.
+    """
+    # Read the version first, so a change made during the build leaves the entry
+    # marked stale.
+    version = get_version(version_key) if version_key else None
+    return store_cached(key, build(), version)
+
+
+def refresh_in_background(key, build, version_key=None):
+    """
+    Rebuild the entry under `key` in a background thread, unless another request
+    is already rebuilding it.
+    """
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, True, BUILD_LOCK_TIMEOUT):
+        return
+
+    def refresh():
+        try:
+            rebuild_cached(key, build, version_key)
+        finally:
+            cache.delete(lock_key)
+            # The thread has its own database connection.
+            connections.close_all()
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def is_current(entry, version_key=None):
+    """
+    Whether a cached entry was built for the current version under `version_key`
+    and can still be served, fresh or stale.
+    """
+    return (
+        entry is not None
+        and time.time() < entry[3]
+        and (version_key is None or entry[1] == get_version(version_key))
+    )
+
+
+def cached_build(key, build, version_key=None):
+    """
+    Return the value cached under `key`, calling `build` to make it if needed.
+
+    An entry built for an older version under `version_key` is never served, so
+    the first request after a change gets the new content. An entry for the
+    current version is fresh until its soft expiry,
+    `WAGTAIL_MEETING_GUIDE_CACHE_TIMEOUT` seconds after it was built; after that
+    it is still served, for up to `WAGTAIL_MEETING_GUIDE_CACHE_STALE_TIMEOUT`
+    seconds more, while one request rebuilds it in the background.
+
+    Without a current entry, one request builds it while the others wait up to
+    `BUILD_WAIT` seconds for it, so a flushed cache or a new version doesn't have
+    every request building the same thing at once. Requests still waiting after
+    that are served the entry for the previous version, if there is one, and
+    only build it themselves when there is nothing to serve.
+    """
+    entry = cache.get(key)
+    if is_current(entry, version_key):
+        if time.time() >= entry[2]:
+            refresh_in_background(key, build, version_key)
+        return entry[0]
+
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + BUILD_WAIT
+    while not cache.add(lock_key, True, BUILD_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            if entry is not None and time.time() < entry[3]:
+                return entry[0]
+            return build()
+
+        # Another request is building it, so wait for that rather than build it
+        # too. If that request fails, its lock is released and a waiting request
+        # takes over.
+        time.sleep(BUILD_WAIT_INTERVAL)
+        latest = cache.get(key)
+        if latest is not None:
+            entry = latest
+            if is_current(entry, version_key):
+                return entry[0]
+
+    try:
+        # The entry may have been built while this request waited for the lock.
+        entry = cache.get(key)
+        if is_current(entry, version_key):
+            return entry[0]
+        return rebuild_cached(key, build, version_key)
+    finally:
+        cache.delete(lock_key)
+
+
+def on_commit_once(func):
+    """
+    Run `func` once the current transaction commits, unless it is already due to,
+    so a transaction that makes many changes runs it only once. Outside a
+    transaction it runs at once.
+    """
+    if not any(entry[1] is func for entry in connection.run_on_commit):
+        transaction.on_commit(func)
+
+
+def get_meeting_type_version():
+    """
+    Return the current generation of meeting types.
+    """
+    return get_version(MEETING_TYPE_VERSION_KEY)
+
+
+def bump_meeting_type_version():
+    """
+    Move meeting types on to a new generation, so every worker looks up the
+    types it keeps in memory again.
+    """
+    return bump_version(MEETING_TYPE_VERSION_KEY)
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe, in-process cache that evicts the least recently used
+    entry, counting its hits and misses.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if not self.maxsize:
+            return
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """
+        The hit and miss counts and current size, for logging and monitoring.
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+            }
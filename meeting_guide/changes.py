@@ -0,0 +1,105 @@
+import datetime
+
+from django.db.models import Max, Q
+
+from .feed import get_meetings, iter_meeting_dicts
+from .models import Group, Location, Meeting, MeetingChange, MeetingType, Region
+from .settings import get_changes_overlap
+
+
+def record_change(meeting, action=MeetingChange.UPDATED):
+    """
+    Log a change to a single meeting page.
+    """
+    MeetingChange.objects.create(meeting_id=meeting.pk, slug=meeting.slug, action=action)
+
+
+def record_changes(meetings, action=MeetingChange.UPDATED):
+    """
+    Log a change to every meeting in a queryset, in one insert.
+    """
+    MeetingChange.objects.bulk_create(
+        MeetingChange(meeting_id=pk, slug=slug, action=action)
+        for pk, slug in meetings.values_list("pk", "slug")
+    )
+
+
+def get_affected_meetings(instance):
+    """
+    The meetings whose feed entries change when a Location or one of the snippets
+    they are built from changes.
+    """
+    if isinstance(instance, Location):
+        return Meeting.objects.filter(meeting_location=instance)
+    if isinstance(instance, Region):
+        return Meeting.objects.filter(
+            meeting_location__region__in=instance.get_descendants(include_self=True)
+        )
+    if isinstance(instance, MeetingType):
+        return Meeting.objects.filter(types=instance)
+    if isinstance(instance, Group):
+        return Meeting.objects.filter(group=instance)
+
+    return Meeting.objects.none()
+
+
+def get_cursor():
+    """
+    The sequence number of the most recent change.
+    """
+    return MeetingChange.objects.aggregate(cursor=Max("id"))["cursor"] or 0
+
+
+def get_changes(since=None):
+    """
+    Return the meetings changed since a cursor, either a change sequence number or
+    a datetime, with tombstones for the slugs that have left the feed and the new
+    cursor to sync from next time. Without a cursor, every meeting is returned.
+
+    Sequence numbers are handed out as changes are written, not as they commit,
+    so a long transaction, such as an import batch, can commit changes numbered
+    below a cursor already sent. Changes written up to
+    `WAGTAIL_MEETING_GUIDE_CHANGES_OVERLAP` seconds before the cursor are sent
+    again to cover them; a meeting or tombstone sent twice does no harm.
+    """
+    # Read the cursor first, so a change made while this runs is sent again next
+    # time rather than missed.
+    cursor = get_cursor()
+    meetings = get_meetings()
+
+    if since is None:
+        return {
+            "cursor": cursor,
+            "meetings": list(iter_meeting_dicts(meetings)),
+            "deleted": [],
+        }
+
+    overlap = datetime.timedelta(seconds=get_changes_overlap())
+    changes = MeetingChange.objects.filter(id__lte=cursor)
+    if isinstance(since, int):
+        since_at = (
+            MeetingChange.objects.filter(id=since)
+            .values_list("changed_at", flat=True)
+            .first()
+        )
+        recent = Q(id__gt=since)
+        if since_at is not None:
+            recent |= Q(changed_at__gte=since_at - overlap)
+        changes = changes.filter(recent)
+    else:
+        changes = changes.filter(changed_at__gt=since - overlap)
+
+    slugs = set(changes.values_list("slug", flat=True))
+
+    # Whatever state a changed meeting is in now decides whether it is sent again
+    # or tombstoned: unpublished, deleted and inactive meetings are not in the feed.
+    meeting_dicts = list(
+        iter_meeting_dicts(meetings.filter(pk__in=changes.values("meeting_id")))
+    )
+    live_slugs = {meeting_dict["slug"] for meeting_dict in meeting_dicts}
+
+    return {
+        "cursor": cursor,
+        "meetings": meeting_dicts,
+        "deleted": sorted(slugs - live_slugs),
+    }
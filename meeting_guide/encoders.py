@@ -0,0 +1,80 @@
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from .settings import get_api_json_encoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def encode_default(obj):
+    """
+    Encode the types the Meeting Guide spec formats specially: times as `HH:MM`,
+    datetimes as `YYYY-MM-DD HH:MM:SS`, and decimals as numbers.
+    """
+    if isinstance(obj, datetime.datetime):
+        return f"{obj:%Y-%m-%d %H:%M:%S}"
+    if isinstance(obj, datetime.time):
+        return f"{obj:%H:%M}"
+    if isinstance(obj, datetime.date):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JSONEncoder:
+    """
+    Encoder backed by the standard library's `json` module.
+    """
+
+    separator = b", "
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=encode_default).encode()
+
+
+class ORJSONEncoder:
+    """
+    Encoder backed by `orjson`, several times faster than the standard library.
+    """
+
+    separator = b","
+
+    def __init__(self):
+        if orjson is None:
+            raise ImproperlyConfigured(
+                "The orjson feed encoder requires the orjson package to be installed."
+            )
+
+    def dumps(self, obj):
+        return orjson.dumps(
+            obj, default=encode_default, option=orjson.OPT_PASSTHROUGH_DATETIME
+        )
+
+
+ENCODERS = {
+    "json": JSONEncoder,
+    "orjson": ORJSONEncoder,
+}
+
+
+def get_encoder():
+    """
+    Return an instance of the configured feed encoder: `auto` (orjson when it is
+    installed, otherwise json), `json`, `orjson`, or the dotted path to a class
+    with the same interface.
+    """
+    name = get_api_json_encoder()
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+
+    encoder_class = ENCODERS.get(name) or import_string(name)
+    return encoder_class()
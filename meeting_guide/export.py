@@ -0,0 +1,122 @@
+import csv
+import datetime
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover
+    openpyxl = None
+
+from .encoders import encode_default
+from .feed import iter_feed, iter_meeting_dicts
+from .settings import get_api_chunk_size
+
+# The spec fields written to CSV and XLSX exports, in column order.
+EXPORT_COLUMNS = (
+    "name",
+    "slug",
+    "day",
+    "time",
+    "end_time",
+    "types",
+    "location",
+    "formatted_address",
+    "latitude",
+    "longitude",
+    "regions",
+    "group",
+    "notes",
+    "conference_url",
+    "conference_phone",
+    "paypal",
+    "venmo",
+    "url",
+    "updated",
+)
+
+# List columns are joined the way `meeting_guide_import` splits them.
+LIST_SEPARATORS = {"types": ",", "regions": " > "}
+
+EXPORT_FORMATS = {
+    "json": ("application/json", "json"),
+    "csv": ("text/csv", "csv"),
+    "xlsx": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "xlsx",
+    ),
+}
+
+
+class Echo:
+    """
+    A file-like object that hands back what is written to it, so `csv.writer` can
+    produce rows for a stream.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_row(meeting_dict):
+    """
+    Flatten a meeting dict into a row of strings and numbers for a spreadsheet.
+    """
+    row = []
+    for column in EXPORT_COLUMNS:
+        value = meeting_dict.get(column)
+        if column in LIST_SEPARATORS:
+            value = LIST_SEPARATORS[column].join(value or [])
+        elif isinstance(value, (datetime.date, datetime.time)):
+            value = encode_default(value)
+        row.append("" if value is None else value)
+
+    return row
+
+
+def iter_json(meetings=None, chunk_size=None):
+    """
+    Yield the meeting list as spec JSON, exactly as the API serves it.
+    """
+    return iter_feed(meetings, chunk_size)
+
+
+def iter_csv(meetings=None, chunk_size=None):
+    """
+    Yield the meeting list as CSV, a chunk of meetings at a time.
+    """
+    chunk_size = chunk_size or get_api_chunk_size()
+    writer = csv.writer(Echo())
+    lines = [writer.writerow(EXPORT_COLUMNS)]
+
+    for count, meeting_dict in enumerate(
+        iter_meeting_dicts(meetings, chunk_size), start=1
+    ):
+        lines.append(writer.writerow(export_row(meeting_dict)))
+        if count % chunk_size == 0:
+            yield "".join(lines).encode()
+            lines = []
+
+    yield "".join(lines).encode()
+
+
+def write_xlsx(output, meetings=None, chunk_size=None):
+    """
+    Write the meeting list to an XLSX file or file-like object. The workbook is
+    built in openpyxl's write-only mode, which writes rows out as they are added
+    rather than holding them in memory.
+    """
+    if openpyxl is None:
+        raise ImproperlyConfigured(
+            "XLSX exports require the openpyxl package to be installed."
+        )
+
+    chunk_size = chunk_size or get_api_chunk_size()
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Meetings")
+    worksheet.append(EXPORT_COLUMNS)
+
+    for meeting_dict in iter_meeting_dicts(meetings, chunk_size):
+        worksheet.append(export_row(meeting_dict))
+
+    workbook.save(output)
@@ -0,0 +1,570 @@
+import base64
+import datetime
+import gzip
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils import timezone
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+from .cache import (
+    FEED_DIRTY_KEY,
+    FEED_LOCK_KEY,
+    FEED_LOCK_TIMEOUT,
+    FEED_VERSION_KEY,
+    LRUCache,
+    bump_feed_version,
+    cached_build,
+    get_feed_cache_key,
+    on_commit_once,
+    store_cached,
+)
+from .encoders import get_encoder
+from .models import FeedSnapshot, Location, Meeting, Region
+from .settings import get_api_chunk_size, get_feed_refresh_delay
+
+# Tracks the `deferred_feed_refresh()` blocks open in each thread.
+deferred = threading.local()
+
+# The timer for this process's next check on the feed, and the lock guarding it.
+refresh_timer = None
+refresh_timer_lock = threading.Lock()
+
+# Seconds to wait before checking again while another worker rebuilds the feed.
+FEED_REFRESH_RETRY = 1
+
+# This process's copies of the latest snapshots, by ETag. Only the ETag is kept in
+# the shared cache, as the snapshot can be larger than a cache item may be.
+snapshot_copies = LRUCache(2)
+
+# Brotli quality for the snapshot. It is compressed while a publish is being
+# handled, and quality 11 takes seconds on a large feed for a small saving.
+SNAPSHOT_BROTLI_QUALITY = 7
+
+# The order of meetings in the feed and its pages. NULL start times are left
+# where the database sorts them, as its index on these columns does: last on
+# PostgreSQL, first on SQLite and MySQL.
+MEETING_ORDERING = ("day_of_week", "start_time", "pk")
+
+MEETING_FIELDS = (
+    "id",
+    "title",
+    "slug",
+    "details",
+    "last_published_at",
+    "day_of_week",
+    "start_time",
+    "end_time",
+    "conference_url",
+    "conference_phone",
+    "district",
+    "paypal",
+    "venmo",
+    "group__gso_number",
+    "meeting_location_id",
+    "meeting_location__title",
+    "meeting_location__formatted_address",
+    "meeting_location__latitude",
+    "meeting_location__longitude",
+    "meeting_location__region_id",
+)
+
+
+def get_meetings():
+    """
+    The live, active meetings that make up the Meeting Guide feed.
+    """
+    return (
+        Meeting.objects.live()
+        .filter(status=Meeting.ACTIVE)
+        .select_related("meeting_location", "group")
+        .order_by(*MEETING_ORDERING)
+    )
+
+
+def filter_meetings(
+    meetings, day=None, region=None, types=None, group=None, updated_since=None
+):
+    """
+    Narrow down a meetings queryset, with each filter mapped onto an indexed
+    column: days of the week, a region and all of its sub-regions (by its MPTT
+    range), spec type codes (meetings must have them all), a group id, and a
+    minimum publish time.
+    """
+    if day:
+        meetings = meetings.filter(day_of_week__in=day)
+
+    if region is not None:
+        region = (
+            Region.objects.filter(pk=region).values("tree_id", "lft", "rght").first()
+        )
+        if region is None:
+            return meetings.none()
+        meetings = meetings.filter(
+            meeting_location__region__in=Region.objects.filter(
+                tree_id=region["tree_id"],
+                lft__gte=region["lft"],
+                rght__lte=region["rght"],
+            ).values("pk")
+        )
+
+    for spec_code in types or []:
+        meetings = meetings.filter(
+            pk__in=Meeting.types.through.objects.filter(
+                meetingtype__spec_code=spec_code
+            ).values("meeting_id")
+        )
+
+    if group is not None:
+        meetings = meetings.filter(group_id=group)
+
+    if updated_since is not None:
+        meetings = meetings.filter(last_published_at__gte=updated_since)
+
+    return meetings
+
+
+def encode_cursor(key):
+    """
+    Encode a meeting's `(day_of_week, start_time, pk)` sort key as an opaque
+    pagination cursor.
+    """
+    day_of_week, start_time, pk = key
+    value = f"{day_of_week},{start_time.isoformat() if start_time else ''},{pk}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a pagination cursor back to its sort key. Raises `ValueError` if the
+    cursor is malformed.
+    """
+    value = base64.urlsafe_b64decode(cursor.encode()).decode()
+    day_of_week, start_time, pk = value.split(",")
+    return (
+        int(day_of_week),
+        datetime.time.fromisoformat(start_time) if start_time else None,
+        int(pk),
+    )
+
+
+def paginate_meetings(meetings, limit, after=None):
+    """
+    Return a page of `limit` meetings following the `after` sort key, and the sort
+    key of its last meeting if there are more. Pages are found by keyset rather
+    than OFFSET, so deep pages cost the same as the first.
+
+    Pages follow the feed's order, which the `(day_of_week, start_time,
+    page_ptr)` index serves as it is; the leading `day_of_week` bound lets the
+    database start reading the index at the cursor.
+    """
+    meetings = meetings.order_by(*MEETING_ORDERING)
+
+    if after is not None:
+        day_of_week, start_time, pk = after
+        nulls_last = connections[meetings.db].features.nulls_order_largest
+        if start_time is None:
+            later_that_day = Q(start_time__isnull=True, pk__gt=pk)
+            if not nulls_last:
+                later_that_day |= Q(start_time__isnull=False)
+        else:
+            later_that_day = Q(start_time__gt=start_time) | Q(
+                start_time=start_time, pk__gt=pk
+            )
+            if nulls_last:
+                later_that_day |= Q(start_time__isnull=True)
+        meetings = meetings.filter(
+            Q(day_of_week__gt=day_of_week)
+            | Q(later_that_day, day_of_week=day_of_week),
+            day_of_week__gte=day_of_week,
+        )
+
+    keys = list(meetings.values_list("day_of_week", "start_time", "pk")[: limit + 1])
+    next_key = keys[limit - 1] if len(keys) > limit else None
+
+    return meetings.filter(pk__in=[key[2] for key in keys[:limit]]), next_key
+
+
+def get_region_ancestors():
+    """
+    Map each region id to the names of its ancestors, root first and including
+    itself, from a single query using each region's materialized ancestor ids.
+    """
+    regions = list(Region.objects.values_list("id", "name", "ancestor_ids"))
+    names = {region_id: name for region_id, name, _ in regions}
+
+    return {
+        region_id: [names[ancestor_id] for ancestor_id in ancestor_ids] + [name]
+        for region_id, name, ancestor_ids in regions
+    }
+
+
+def get_meeting_types(meetings):
+    """
+    Map each meeting id to its list of spec codes with a single query against the
+    ParentalManyToManyField's through table. `meetings` is a queryset or a list of
+    meeting ids.
+    """
+    through = Meeting.types.through
+    rows = (
+        through.objects.filter(meeting__in=meetings)
+        .order_by("meetingtype__display_order", "meetingtype__type_name")
+        .values_list("meeting_id", "meetingtype__spec_code")
+    )
+
+    meeting_types = {}
+    for meeting_id, spec_code in rows:
+        meeting_types.setdefault(meeting_id, []).append(spec_code)
+
+    return meeting_types
+
+
+def meeting_to_dict(meeting, meeting_types, region_ancestors):
+    """
+    Serialize one meeting row, as returned by `.values(*MEETING_FIELDS)`, into the
+    Meeting Guide spec format. Dates and times are left for the feed encoder.
+    """
+    group_info = ""
+    if len(meeting["district"]):
+        location = f"{meeting['meeting_location__title']} (D{meeting['district']})"
+        group_info = f"D{meeting['district']}"
+    else:
+        location = meeting["meeting_location__title"]
+
+    gso_number = meeting["group__gso_number"]
+    if gso_number and len(gso_number):
+        group_info += f" / GSO #{gso_number}"
+
+    meeting_dict = {
+        "name": meeting["title"],
+        "slug": meeting["slug"],
+        "notes": meeting["details"],
+        "updated": meeting["last_published_at"] or datetime.datetime.now(),
+        "url": f"{settings.BASE_URL}/meetings/?meeting={meeting['slug']}",
+        "day": meeting["day_of_week"],
+        "time": meeting["start_time"],
+        "end_time": meeting["end_time"],
+        "conference_url": meeting["conference_url"],
+        "conference_phone": meeting["conference_phone"],
+        "types": meeting_types.get(meeting["id"], []),
+        "location": location,
+        "formatted_address": meeting["meeting_location__formatted_address"],
+        "latitude": meeting["meeting_location__latitude"],
+        "longitude": meeting["meeting_location__longitude"],
+        "regions": region_ancestors.get(meeting["meeting_location__region_id"], []),
+        "group": group_info,
+    }
+
+    if len(meeting["paypal"]):
+        meeting_dict["paypal"] = meeting["paypal"]
+
+    if len(meeting["venmo"]):
+        meeting_dict["venmo"] = meeting["venmo"]
+
+    if "feedback_url" in settings.MEETING_GUIDE:
+        meeting_dict["feedback_url"] = settings.MEETING_GUIDE["feedback_url"]
+
+    return meeting_dict
+
+
+def iter_meeting_dicts(meetings=None, chunk_size=None):
+    """
+    Yield the meeting dicts for the Meeting Guide API.
+
+    Without a `chunk_size`, this takes a fixed number of queries: one for the
+    meetings with their locations and groups, one for their types, and one for the
+    region tree. With a `chunk_size`, meetings are read with a chunked iterator
+    and their types looked up a chunk at a time, so memory stays bounded however
+    many meetings there are.
+    """
+    if meetings is None:
+        meetings = get_meetings()
+
+    region_ancestors = get_region_ancestors()
+    rows = meetings.values(*MEETING_FIELDS)
+
+    if chunk_size is None:
+        meeting_types = get_meeting_types(meetings)
+        for meeting in rows:
+            yield meeting_to_dict(meeting, meeting_types, region_ancestors)
+        return
+
+    rows = rows.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        meeting_types = get_meeting_types([meeting["id"] for meeting in chunk])
+        for meeting in chunk:
+            yield meeting_to_dict(meeting, meeting_types, region_ancestors)
+
+
+def build_feed(meetings=None):
+    """
+    Build the list of meeting dicts for the Meeting Guide API in a fixed number of
+    queries.
+    """
+    return list(iter_meeting_dicts(meetings))
+
+
+def iter_feed(meetings=None, chunk_size=None):
+    """
+    Yield the serialized feed a chunk of meetings at a time. The joined output is
+    byte for byte the same as serializing the whole list at once.
+    """
+    chunk_size = chunk_size or get_api_chunk_size()
+    encoder = get_encoder()
+    parts = [b"["]
+    separator = b""
+
+    for count, meeting_dict in enumerate(
+        iter_meeting_dicts(meetings, chunk_size), start=1
+    ):
+        parts.append(separator + encoder.dumps(meeting_dict))
+        separator = encoder.separator
+
+        if count % chunk_size == 0:
+            yield b"".join(parts)
+            parts = []
+
+    parts.append(b"]")
+    yield b"".join(parts)
+
+
+def render_feed():
+    """
+    Serialize the full meeting feed to the bytes served by the API.
+    """
+    return b"".join(iter_feed())
+
+
+def get_last_modified():
+    """
+    The newest publish time of the live Meetings and Locations in the feed.
+    """
+    newest = [
+        queryset.aggregate(newest=Max("last_published_at"))["newest"]
+        for queryset in (get_meetings(), Location.objects.live())
+    ]
+    return max(filter(None, newest), default=None)
+
+
+def rebuild_snapshot():
+    """
+    Regenerate the stored feed snapshot from the current content and return it.
+    """
+    content = render_feed()
+    etag = hashlib.sha256(content).hexdigest()
+    last_modified = get_last_modified()
+
+    previous = (
+        FeedSnapshot.objects.filter(name=FeedSnapshot.MEETINGS)
+        .values("etag", "last_modified")
+        .first()
+    )
+    if previous and previous["etag"] != etag:
+        # Region, type and group edits change the feed without publishing a page,
+        # so make sure Last-Modified still moves forward.
+        if last_modified is None or (
+            previous["last_modified"] and last_modified <= previous["last_modified"]
+        ):
+            last_modified = timezone.now()
+
+    snapshot, _ = FeedSnapshot.objects.update_or_create(
+        name=FeedSnapshot.MEETINGS,
+        defaults={
+            "content": content,
+            "content_gzip": gzip.compress(content, compresslevel=9, mtime=0),
+            "content_brotli": (
+                brotli.compress(content, quality=SNAPSHOT_BROTLI_QUALITY)
+                if brotli
+                else None
+            ),
+            "etag": etag,
+            "last_modified": last_modified,
+        },
+    )
+    return snapshot
+
+
+def get_snapshot():
+    """
+    Return the stored feed snapshot, building it the first time it is needed, and
+    keep a copy of it in this process.
+    """
+    snapshot = FeedSnapshot.objects.filter(name=FeedSnapshot.MEETINGS).first()
+    if snapshot is None or not snapshot.etag or snapshot.content_gzip is None:
+        snapshot = rebuild_snapshot()
+
+    # Some database backends return a memoryview; keep plain bytes.
+    snapshot.content = bytes(snapshot.content)
+    snapshot.content_gzip = bytes(snapshot.content_gzip)
+    if snapshot.content_brotli is not None:
+        snapshot.content_brotli = bytes(snapshot.content_brotli)
+
+    snapshot_copies.set(snapshot.etag, snapshot)
+    return snapshot
+
+
+def get_cached_snapshot():
+    """
+    Return the feed snapshot. Its ETag is cached once per feed version, and each
+    process keeps its own copy of the snapshot for that ETag, so the snapshot is
+    read from the database once per process when the feed changes.
+    """
+    etag = cached_build(
+        get_feed_cache_key("snapshot-etag"),
+        lambda: get_snapshot().etag,
+        FEED_VERSION_KEY,
+    )
+
+    snapshot = snapshot_copies.get(etag)
+    if snapshot is None:
+        snapshot = get_snapshot()
+        # The stored snapshot may already be newer than the cached ETag; keep
+        # serving it until the version moves on rather than reading it again.
+        snapshot_copies.set(etag, snapshot)
+
+    return snapshot
+
+
+def refresh_feed(wait=True):
+    """
+    Rebuild the snapshot, then move readers on to a new feed version so they
+    pick it up. Until then, readers keep getting the previous snapshot.
+
+    Only one worker rebuilds at a time. If another worker is rebuilding, wait
+    for it to finish and then rebuild, or with `wait` off, leave the rebuild to
+    it. Return whether the feed was rebuilt.
+    """
+    # The lock expires, so a worker that dies mid-build doesn't hold it forever.
+    while not cache.add(FEED_LOCK_KEY, True, FEED_LOCK_TIMEOUT):
+        if not wait:
+            return False
+        time.sleep(FEED_REFRESH_RETRY)
+
+    try:
+        # Changes from here on may be too late for this build, so they mark the
+        # feed as changed again.
+        cache.delete(FEED_DIRTY_KEY)
+        snapshot = rebuild_snapshot()
+        version = bump_feed_version()
+
+        # Cache the new snapshot's ETag straight away, so readers don't have to.
+        snapshot_copies.set(snapshot.etag, snapshot)
+        store_cached(get_feed_cache_key("snapshot-etag"), snapshot.etag, version)
+    finally:
+        cache.delete(FEED_LOCK_KEY)
+
+    return True
+
+
+def refresh_feed_if_dirty():
+    """
+    Refresh the feed if it has changes waiting and no other worker is already
+    refreshing it, and return whether it was refreshed.
+    """
+    if cache.get(FEED_DIRTY_KEY) is None:
+        return False
+
+    return refresh_feed(wait=False)
+
+
+def refresh_feed_when_quiet():
+    """
+    Refresh the feed once no change has come in, from any worker, for
+    `WAGTAIL_MEETING_GUIDE_FEED_REFRESH_DELAY` seconds. Until then, or while
+    another worker is refreshing it, check again later.
+    """
+    changed_at = cache.get(FEED_DIRTY_KEY)
+    if changed_at is None:
+        return
+
+    delay = get_feed_refresh_delay()
+    wait = changed_at + delay - time.time()
+    if wait > 0:
+        start_refresh_timer(wait)
+    elif not refresh_feed_if_dirty() and cache.get(FEED_DIRTY_KEY) is not None:
+        start_refresh_timer(delay or FEED_REFRESH_RETRY)
+
+
+def start_refresh_timer(delay):
+    """
+    Check on the feed in `delay` seconds, in a background thread, unless this
+    process already has a check coming up.
+    """
+    global refresh_timer
+    with refresh_timer_lock:
+        if refresh_timer is None:
+            refresh_timer = threading.Timer(delay, run_refresh_timer)
+            refresh_timer.start()
+
+
+def run_refresh_timer():
+    """
+    The body of the refresh timer's thread.
+    """
+    global refresh_timer
+    with refresh_timer_lock:
+        refresh_timer = None
+
+    try:
+        refresh_feed_when_quiet()
+    finally:
+        # The timer thread has its own database connection.
+        connections.close_all()
+
+
+def request_feed_refresh():
+    """
+    Mark the feed as changed, and refresh it once changes have stopped for the
+    refresh delay: straight away without one, or in a background thread.
+    """
+    cache.set(FEED_DIRTY_KEY, time.time(), None)
+
+    delay = get_feed_refresh_delay()
+    if delay:
+        start_refresh_timer(delay)
+    else:
+        refresh_feed_when_quiet()
+
+
+def schedule_feed_refresh():
+    """
+    Refresh the feed once the current transaction commits, so the snapshot never
+    sees uncommitted content. Several changes in one transaction (a Location
+    deleted with its Meetings, say) share a single refresh, and with
+    `WAGTAIL_MEETING_GUIDE_FEED_REFRESH_DELAY` set, so do bursts of changes over
+    many transactions. Inside a `deferred_feed_refresh()` block, the refresh
+    waits until the block ends.
+    """
+    if getattr(deferred, "depth", 0):
+        deferred.pending = True
+        return
+
+    on_commit_once(request_feed_refresh)
+
+
+@contextmanager
+def deferred_feed_refresh():
+    """
+    Hold back the feed refreshes that bulk changes would schedule one transaction
+    at a time, and schedule a single refresh when the block ends instead.
+    """
+    deferred.depth = getattr(deferred, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        # Changes committed before an error still need to reach the feed.
+        deferred.depth -= 1
+        if not deferred.depth and getattr(deferred, "pending", False):
+            deferred.pending = False
+            schedule_feed_refresh()
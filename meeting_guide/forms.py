@@ -0,0 +1,210 @@
+import hashlib
+
+from django import forms
+
+from .feed import decode_cursor
+from .models import Location, Meeting, MeetingType
+
+
+class MeetingFilterForm(forms.Form):
+    """
+    Query parameters for narrowing down the meetings API.
+    """
+
+    day = forms.TypedMultipleChoiceField(
+        choices=Meeting.DAY_OF_WEEK, coerce=int, required=False
+    )
+    region = forms.IntegerField(
+        required=False, help_text="A region id; includes its sub-regions."
+    )
+    types = forms.CharField(
+        required=False, help_text="Comma separated Meeting Guide spec codes."
+    )
+    group = forms.IntegerField(required=False)
+    updated_since = forms.DateTimeField(required=False)
+    limit = forms.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=1000,
+        help_text="Return meetings a page of this many at a time.",
+    )
+    after = forms.CharField(
+        required=False, help_text="The cursor for the next page, from the last page."
+    )
+
+    PAGINATION_FIELDS = ("limit", "after")
+
+    def clean_types(self):
+        return sorted(
+            {code.strip() for code in self.cleaned_data["types"].split(",")} - {""}
+        )
+
+    def clean_after(self):
+        if not self.cleaned_data["after"]:
+            return None
+
+        try:
+            return decode_cursor(self.cleaned_data["after"])
+        except ValueError:
+            raise forms.ValidationError("Enter a valid cursor.")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("after") and not cleaned_data.get("limit"):
+            self.add_error("after", "A cursor can only be used with a limit.")
+
+        return cleaned_data
+
+    def get_filters(self):
+        """
+        The filters that were actually given, as keyword arguments for
+        `meeting_guide.feed.filter_meetings`.
+        """
+        return {
+            name: value
+            for name, value in self.cleaned_data.items()
+            if value not in (None, "", []) and name not in self.PAGINATION_FIELDS
+        }
+
+    def get_cache_key(self):
+        """
+        A stable key for this combination of filters and page, whatever order the
+        query parameters were given in.
+        """
+        parts = []
+        for name, value in sorted(self.cleaned_data.items()):
+            if value in (None, "", []):
+                continue
+            if isinstance(value, list):
+                value = sorted(value)
+            if isinstance(value, (list, tuple)):
+                value = ",".join(str(item) for item in value)
+            parts.append(f"{name}={value}")
+
+        return hashlib.md5("&".join(parts).encode()).hexdigest()
+
+
+class MeetingsNearForm(forms.Form):
+    """
+    Query parameters for finding the meetings near a point.
+    """
+
+    DEFAULT_RADIUS = 10
+
+    lat = forms.FloatField(min_value=-90, max_value=90)
+    lng = forms.FloatField(min_value=-180, max_value=180)
+    radius = forms.FloatField(
+        required=False, min_value=0, max_value=500, help_text="In miles."
+    )
+    day = forms.TypedMultipleChoiceField(
+        choices=Meeting.DAY_OF_WEEK, coerce=int, required=False
+    )
+    time = forms.TimeField(
+        required=False, help_text="Only meetings starting at or after this time."
+    )
+
+    def clean_radius(self):
+        radius = self.cleaned_data["radius"]
+        return self.DEFAULT_RADIUS if radius is None else radius
+
+
+class LocationMapForm(forms.Form):
+    """
+    Query parameters for the clustered map of locations.
+    """
+
+    bbox = forms.CharField(
+        required=False, help_text="west,south,east,north in decimal degrees."
+    )
+    zoom = forms.IntegerField(required=False, min_value=0, max_value=24)
+
+    def clean_bbox(self):
+        if not self.cleaned_data["bbox"]:
+            return None
+
+        try:
+            west, south, east, north = (
+                float(value) for value in self.cleaned_data["bbox"].split(",")
+            )
+        except ValueError:
+            raise forms.ValidationError("Enter west,south,east,north coordinates.")
+
+        if south > north:
+            raise forms.ValidationError("The south edge must be below the north edge.")
+
+        return west, south, east, north
+
+    def clean_zoom(self):
+        zoom = self.cleaned_data["zoom"]
+        return 0 if zoom is None else zoom
+
+
+class MeetingChangesForm(forms.Form):
+    """
+    Query parameters for the delta API.
+    """
+
+    since = forms.CharField(
+        required=False,
+        help_text="The cursor from a previous response, or a date and time.",
+    )
+
+    def clean_since(self):
+        since = self.cleaned_data["since"].strip()
+        if not since:
+            return None
+        if since.isdigit():
+            return int(since)
+
+        return forms.DateTimeField().clean(since)
+
+
+class MeetingStatusForm(forms.Form):
+    """
+    The status for the set status bulk action.
+    """
+
+    status = forms.TypedChoiceField(choices=Meeting.STATUS_CHOICES, coerce=int)
+
+
+class MeetingTypeForm(forms.Form):
+    """
+    The meeting type for the add and remove type bulk actions.
+    """
+
+    # The online type follows each meeting's conference URL, as in the editor.
+    meeting_type = forms.ModelChoiceField(
+        queryset=MeetingType.objects.filter(intergroup_code__isnull=False)
+    )
+
+
+class MeetingLocationForm(forms.Form):
+    """
+    The Location for the move to location bulk action.
+    """
+
+    location = forms.ModelChoiceField(queryset=Location.objects.order_by("title"))
+
+
+class MeetingDistrictForm(forms.Form):
+    """
+    The district and area for the set district bulk action.
+    """
+
+    district = forms.CharField(
+        max_length=10,
+        required=False,
+        help_text="Leave blank to keep each meeting's district.",
+    )
+    area = forms.CharField(
+        max_length=10,
+        required=False,
+        help_text="Leave blank to keep each meeting's area.",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get("district") and not cleaned_data.get("area"):
+            raise forms.ValidationError("Enter a district, an area, or both.")
+
+        return cleaned_data
@@ -0,0 +1,217 @@
+import math
+
+from django.db.models import Count, Q
+
+from .cache import FEED_VERSION_KEY, cached_build, get_feed_cache_key
+from .feed import get_meetings, iter_meeting_dicts
+from .models import Location, Meeting
+from .settings import get_cluster_max_zoom
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LATITUDE = 69.0
+
+# Clusters are grid cells this many pixels wide on a 256 pixel map tile.
+CLUSTER_CELL_PIXELS = 64
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """
+    The great-circle distance between two points, in miles.
+    """
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius):
+    """
+    Return `(min_lat, max_lat, min_lng, max_lng)` for a box that contains every
+    point within `radius` miles of `lat`, `lng`. Longitudes may fall outside
+    -180 to 180 when the box crosses the antimeridian.
+    """
+    delta_lat = radius / MILES_PER_DEGREE_LATITUDE
+    # Degrees of longitude shrink towards the poles; near them, take them all.
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 0.01:
+        delta_lng = 180.0
+    else:
+        delta_lng = min(180.0, delta_lat / cos_lat)
+
+    return lat - delta_lat, lat + delta_lat, lng - delta_lng, lng + delta_lng
+
+
+def bounding_box_q(lat, lng, radius, prefix=""):
+    """
+    A filter on the indexed latitude and longitude columns that keeps only the
+    points inside the bounding box around `lat`, `lng`.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    q = Q(**{f"{prefix}latitude__range": (min_lat, max_lat)})
+
+    if min_lng < -180:
+        return q & (
+            Q(**{f"{prefix}longitude__gte": min_lng + 360})
+            | Q(**{f"{prefix}longitude__lte": max_lng})
+        )
+    if max_lng > 180:
+        return q & (
+            Q(**{f"{prefix}longitude__gte": min_lng})
+            | Q(**{f"{prefix}longitude__lte": max_lng - 360})
+        )
+
+    return q & Q(**{f"{prefix}longitude__range": (min_lng, max_lng)})
+
+
+def get_meetings_near(lat, lng, radius, meetings=None):
+    """
+    Return the meeting dicts for the meetings within `radius` miles of `lat`,
+    `lng`, nearest first, each with its `distance` in miles. Candidates are pruned
+    with the bounding box in the database before exact distances are computed.
+    """
+    if meetings is None:
+        meetings = get_meetings()
+
+    meetings = meetings.filter(
+        bounding_box_q(lat, lng, radius, prefix="meeting_location__")
+    )
+
+    nearby = []
+    for meeting_dict in iter_meeting_dicts(meetings):
+        distance = haversine(
+            lat, lng, meeting_dict["latitude"], meeting_dict["longitude"]
+        )
+        if distance <= radius:
+            meeting_dict["distance"] = round(distance, 2)
+            nearby.append(meeting_dict)
+
+    nearby.sort(key=lambda meeting_dict: meeting_dict["distance"])
+
+    return nearby
+
+
+def get_location_points():
+    """
+    Return `(id, title, formatted_address, latitude, longitude, meetings)` for every
+    live, geocoded Location with active meetings.
+    """
+    return list(
+        Location.objects.live()
+        .filter(latitude__isnull=False, longitude__isnull=False)
+        .annotate(
+            meeting_count=Count(
+                "meetings",
+                filter=Q(meetings__live=True, meetings__status=Meeting.ACTIVE),
+            )
+        )
+        .filter(meeting_count__gt=0)
+        .order_by("pk")
+        .values_list(
+            "pk", "title", "formatted_address", "latitude", "longitude", "meeting_count"
+        )
+    )
+
+
+def location_feature(point):
+    """
+    A GeoJSON feature for a single location.
+    """
+    pk, title, formatted_address, latitude, longitude, meetings = point
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+        "properties": {
+            "cluster": False,
+            "id": pk,
+            "name": title,
+            "formatted_address": formatted_address,
+            "meetings": meetings,
+        },
+    }
+
+
+def cluster_points(points, zoom):
+    """
+    Group points into square grid cells sized for a zoom level, returning a GeoJSON
+    feature for each cell at the average position of its points. Cells holding a
+    single location are returned as that location.
+    """
+    cell_size = 360 / 2**zoom * CLUSTER_CELL_PIXELS / 256
+    cells = {}
+    for point in points:
+        latitude, longitude = point[3], point[4]
+        cell = (math.floor(latitude / cell_size), math.floor(longitude / cell_size))
+        cells.setdefault(cell, []).append(point)
+
+    features = []
+    for cell_points in cells.values():
+        if len(cell_points) == 1:
+            features.append(location_feature(cell_points[0]))
+            continue
+
+        count = len(cell_points)
+        latitude = sum(point[3] for point in cell_points) / count
+        longitude = sum(point[4] for point in cell_points) / count
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+                "properties": {
+                    "cluster": True,
+                    "count": count,
+                    "meetings": sum(point[5] for point in cell_points),
+                },
+            }
+        )
+
+    return features
+
+
+def get_clusters():
+    """
+    Return the GeoJSON features for every zoom level up to the maximum cluster
+    zoom, plus the individual locations for higher zoom levels under `None`. They
+    are computed together once per feed version, which moves on whenever a
+    Location is published.
+    """
+    return cached_build(get_feed_cache_key("clusters"), build_clusters, FEED_VERSION_KEY)
+
+
+def build_clusters():
+    """
+    Cluster the locations for every zoom level, for `get_clusters`.
+    """
+    points = get_location_points()
+    clusters = {
+        zoom: cluster_points(points, zoom) for zoom in range(get_cluster_max_zoom() + 1)
+    }
+    clusters[None] = [location_feature(point) for point in points]
+
+    return clusters
+
+
+def get_location_features(zoom, bbox=None):
+    """
+    Return a GeoJSON FeatureCollection of the clusters or locations for a zoom
+    level, inside a `(west, south, east, north)` bounding box if one is given.
+    """
+    clusters = get_clusters()
+    features = clusters.get(zoom, clusters[None])
+
+    if bbox is not None:
+        west, south, east, north = bbox
+
+        def in_bbox(feature):
+            longitude, latitude = feature["geometry"]["coordinates"]
+            if not south <= latitude <= north:
+                return False
+            if west <= east:
+                return west <= longitude <= east
+            # The box crosses the antimeridian.
+            return longitude >= west or longitude <= east
+
+        features = [feature for feature in features if in_bbox(feature)]
+
+    return {"type": "FeatureCollection", "features": features}
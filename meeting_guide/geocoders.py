@@ -0,0 +1,115 @@
+import csv
+import functools
+import re
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from .settings import (
+    get_gazetteer_path,
+    get_geocode_timeout,
+    get_geocode_url,
+    get_geocoder_name,
+)
+
+# Gazetteer columns that are not Google address component types.
+GAZETTEER_FIELDS = ("address", "formatted_address", "lat", "lng")
+
+
+def normalize_address(full_address):
+    """
+    The key an address is cached under: lowercase letters and digits only.
+    """
+    return re.sub("[^0-9a-zA-Z]+", "", full_address.lower().lstrip(" "))[:255]
+
+
+class GoogleGeocoder:
+    """
+    Geocoder backed by the Google Geocoding API.
+    """
+
+    cacheable = True
+    rate_limited = True
+
+    def geocode(self, full_address, session=None):
+        payload = {
+            "bounds": settings.GOOGLE_MAPS_API_BOUNDS,
+            "key": settings.GOOGLE_MAPS_V3_APIKEY,
+            "address": full_address.lstrip(" ").replace("'", ""),
+        }
+
+        # Send the request to Google Maps
+        r = (session or requests).get(
+            get_geocode_url(), params=payload, timeout=get_geocode_timeout()
+        )
+        return r.json()
+
+
+@functools.lru_cache(maxsize=None)
+def load_gazetteer(path):
+    """
+    Read a gazetteer CSV into Google-shaped results keyed on normalized address.
+    Besides `address`, `lat` and `lng`, and an optional `formatted_address`, every
+    column is an address component named by its Google type, such as `route`,
+    `locality` or `administrative_area_level_2`.
+    """
+    results = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            results[normalize_address(row["address"])] = {
+                "formatted_address": row.get("formatted_address") or row["address"],
+                "geometry": {
+                    "location": {"lat": float(row["lat"]), "lng": float(row["lng"])}
+                },
+                "address_components": [
+                    {"long_name": value, "short_name": value, "types": [name]}
+                    for name, value in row.items()
+                    if name not in GAZETTEER_FIELDS and value
+                ],
+            }
+
+    return results
+
+
+class GazetteerGeocoder:
+    """
+    Offline geocoder that looks addresses up in a local CSV gazetteer, set with
+    `WAGTAIL_MEETING_GUIDE_GAZETTEER`, and answers in the Google response format.
+    Lookups are already local, so they skip the geocode cache and rate limits.
+    """
+
+    cacheable = False
+    rate_limited = False
+
+    def __init__(self):
+        path = get_gazetteer_path()
+        if not path:
+            raise ImproperlyConfigured(
+                "The gazetteer geocoder requires WAGTAIL_MEETING_GUIDE_GAZETTEER."
+            )
+        self.results = load_gazetteer(str(path))
+
+    def geocode(self, full_address, session=None):
+        result = self.results.get(normalize_address(full_address))
+        if result is None:
+            return {"status": "ZERO_RESULTS", "results": []}
+
+        return {"status": "OK", "results": [result]}
+
+
+GEOCODERS = {
+    "google": GoogleGeocoder,
+    "gazetteer": GazetteerGeocoder,
+}
+
+
+def get_geocoder():
+    """
+    Return an instance of the configured geocoder: `google`, `gazetteer`, or the
+    dotted path to a class with the same interface.
+    """
+    name = get_geocoder_name()
+    geocoder_class = GEOCODERS.get(name) or import_string(name)
+    return geocoder_class()
@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.db import connections
+from requests.adapters import HTTPAdapter
+
+from .geocoders import get_geocoder, normalize_address
+from .models import GeocodeCache
+from .settings import get_geocode_rate_limit
+from .utils import geocode_expired, get_geocode_address
+
+# Statuses worth retrying: the quota resets, and Google's own errors are transient.
+RETRY_STATUSES = ("OVER_QUERY_LIMIT", "UNKNOWN_ERROR")
+
+
+class RateLimiter:
+    """
+    Space calls out to at most `rate` per second across every thread sharing it.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_call = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+def get_session(workers):
+    """
+    A `requests.Session` whose connection pool is large enough for every worker to
+    keep its connection open.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_uncached_addresses(addresses):
+    """
+    The addresses, without duplicates, that have no current result in the geocode
+    cache. Cached addresses are skipped, so an interrupted run picks up where it
+    left off.
+    """
+    keys = {}
+    for address in addresses:
+        keys.setdefault(normalize_address(address), address)
+
+    if not get_geocoder().cacheable:
+        return list(keys.values())
+
+    cached = GeocodeCache.objects.filter(address_key__in=keys).values_list(
+        "address_key", "fetched_at", "status"
+    )
+    for address_key, fetched_at, status in cached.iterator():
+        if not geocode_expired(fetched_at, status):
+            del keys[address_key]
+
+    return list(keys.values())
+
+
+def geocode_with_backoff(address, session, limiter, max_retries=5, backoff=1.0):
+    """
+    Geocode an address, retrying with exponential backoff and jitter while the
+    API reports its quota used up or a transient error. Any other failure is
+    reported for the address, so one bad address can't stop a batch run.
+    """
+    for attempt in range(max_retries + 1):
+        limiter.wait()
+        try:
+            address_components = get_geocode_address(address, session)
+        except requests.RequestException as e:
+            address_components = {"status": "UNKNOWN_ERROR", "problem": str(e)}
+        except Exception as e:
+            address_components = {
+                "status": "ERROR",
+                "problem": f"Geocoding {address} failed: {e!r}",
+            }
+
+        if address_components.get("status") not in RETRY_STATUSES:
+            break
+
+        if attempt < max_retries:
+            time.sleep(backoff * 2**attempt * (1 + random.random()))
+
+    return address_components
+
+
+def geocode_addresses(addresses, workers=4, rate=None, max_retries=5, backoff=1.0):
+    """
+    Geocode many addresses concurrently through a shared connection pool, at no
+    more than `rate` requests per second when the geocoder calls out to a rate
+    limited service. Yield `(address, address_components)`
+    for each address as it finishes; results from remote geocoders are stored in
+    the geocode cache as they come in.
+    """
+    if get_geocoder().rate_limited:
+        limiter = RateLimiter(rate or get_geocode_rate_limit())
+    else:
+        limiter = RateLimiter(None)
+    session = get_session(workers)
+
+    def geocode(address):
+        try:
+            return address, geocode_with_backoff(
+                address, session, limiter, max_retries, backoff
+            )
+        finally:
+            # Each worker thread has its own database connection.
+            connections.close_all()
+
+    with session, ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(geocode, get_uncached_addresses(addresses))
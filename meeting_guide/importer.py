@@ -0,0 +1,324 @@
+import csv
+import datetime
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .changes import record_changes
+from .feed import deferred_feed_refresh, schedule_feed_refresh
+from .geocoders import normalize_address
+from .models import Group, Location, Meeting, MeetingType, Region
+from .search import deferred_search_indexing
+from .utils import get_geocode_address
+
+# Columns of an import CSV that hold lists.
+CSV_LIST_SEPARATORS = {"day": ",", "types": ",", "regions": " > "}
+
+# Lookup tables the importer adds new rows' objects to, undone with the row.
+IMPORTER_LOOKUPS = ("regions", "groups", "locations", "meeting_slugs")
+
+
+def read_meetings(path, format=None):
+    """
+    Read meetings in the Meeting Guide spec format from a JSON file, or from a CSV
+    file with a column for each spec field. In CSV files, `day` and `types` are
+    comma separated and `regions` are separated by " > ", as in a Region's path.
+    """
+    path = Path(path)
+    format = format or path.suffix.lstrip(".").lower()
+
+    if format == "json":
+        with open(path) as f:
+            return json.load(f)
+
+    if format == "csv":
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            for column, separator in CSV_LIST_SEPARATORS.items():
+                if row.get(column):
+                    row[column] = [
+                        value.strip() for value in row[column].split(separator)
+                    ]
+        return rows
+
+    raise ValueError(f"Unknown meeting list format: {format}")
+
+
+def parse_time(value):
+    """
+    Parse a spec `HH:MM` time, or return `None` for a blank one.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime.time):
+        return value
+    return datetime.time.fromisoformat(value.strip())
+
+
+def get_region_names(row):
+    """
+    The names of a spec row's region and its ancestors, top-level first, from
+    its `regions`, or its `region` and `sub_region`.
+    """
+    names = row.get("regions") or [
+        name for name in (row.get("region"), row.get("sub_region")) if name
+    ]
+    if isinstance(names, str):
+        names = [names]
+    return names
+
+
+def unique_slug(slug, taken):
+    """
+    Return `slug`, or `slug` with a numeric suffix if it is already taken, and
+    mark it as taken.
+    """
+    candidate = slug
+    suffix = 2
+    while candidate in taken:
+        candidate = f"{slug}-{suffix}"
+        suffix += 1
+
+    taken.add(candidate)
+    return candidate
+
+
+class MeetingImporter:
+    """
+    Create Location and Meeting pages from a list of spec meetings.
+
+    Regions, types, groups and existing locations are read once into lookup
+    tables, so no queries are spent resolving them per meeting. Locations are
+    deduplicated by their normalized address. Pages are created live in
+    transactions of `batch_size` meetings, and the search index, feed and delta
+    log are brought up to date once at the end rather than page by page.
+    """
+
+    def __init__(self, parent, batch_size=100, geocode=False, region_root=None):
+        self.parent = parent
+        self.region_root = region_root
+        self.batch_size = batch_size
+        self.geocode = geocode
+        self.now = timezone.now()
+
+        self.regions = {region.path: region for region in Region.objects.all()}
+        self.types = {
+            meeting_type.spec_code: meeting_type
+            for meeting_type in MeetingType.objects.exclude(spec_code__isnull=True)
+        }
+        self.groups = {group.name: group for group in Group.objects.all()}
+        self.locations = {
+            normalize_address(location.formatted_address): location
+            for location in Location.objects.exclude(formatted_address__isnull=True)
+        }
+        self.location_slugs = set(parent.get_children().values_list("slug", flat=True))
+        self.meeting_slugs = {}
+
+        self.stats = {"meetings": 0, "locations": 0, "regions": 0, "skipped": 0}
+        self.errors = []
+
+    def get_region(self, row):
+        """
+        Find the region named by a meeting's `regions`, creating any that are
+        missing. With a `region_root`, the row's regions are looked up below it.
+
+        Locations must be in a sub-region, so without a `region_root` a row with
+        only a top-level region is refused before anything is created.
+        """
+        names = get_region_names(row)
+        if not names:
+            raise ValueError("has no region")
+
+        parent = self.region_root
+        if parent is None and len(names) == 1:
+            raise ValueError(
+                f"has only the top-level region {names[0]}, which can't hold "
+                "locations"
+            )
+
+        prefix = [parent.path] if parent else []
+        for depth in range(1, len(names) + 1):
+            path = " > ".join(prefix + names[:depth])
+            if path not in self.regions:
+                self.regions[path] = Region.objects.create(
+                    name=names[depth - 1], parent=parent
+                )
+                self.stats["regions"] += 1
+            parent = self.regions[path]
+
+        return parent
+
+    def get_lat_lng(self, row, formatted_address):
+        """
+        The meeting's coordinates as a `lat_lng` value, from the row or, with
+        geocoding on, from its address.
+        """
+        latitude, longitude = row.get("latitude"), row.get("longitude")
+        if (latitude in (None, "") or longitude in (None, "")) and self.geocode:
+            address_components = get_geocode_address(formatted_address)
+            latitude = address_components.get("lat")
+            longitude = address_components.get("lng")
+
+        if latitude in (None, "") or longitude in (None, ""):
+            return None
+
+        return "SRID=4326;POINT({0} {1})".format(float(longitude), float(latitude))
+
+    def get_location(self, row):
+        """
+        Find the Location for a meeting by its address, creating it if needed.
+        """
+        formatted_address = (row.get("formatted_address") or "").strip()
+        if not formatted_address:
+            raise ValueError("has no formatted_address")
+
+        address_key = normalize_address(formatted_address)
+        if address_key in self.locations:
+            return self.locations[address_key]
+
+        region = self.get_region(row)
+        lat_lng = self.get_lat_lng(row, formatted_address)
+        title = row.get("location") or formatted_address
+        location = Location(
+            title=title,
+            slug=unique_slug(slugify(title)[:200] or "location", self.location_slugs),
+            region=region,
+            formatted_address=formatted_address,
+            lat_lng=lat_lng,
+            postal_code=row.get("postal_code") or "",
+            details=row.get("location_notes") or None,
+            live=True,
+            first_published_at=self.now,
+            last_published_at=self.now,
+        )
+        self.parent.add_child(instance=location)
+
+        self.locations[address_key] = location
+        self.meeting_slugs[location.pk] = set()
+        self.stats["locations"] += 1
+        return location
+
+    def get_group(self, row):
+        name = row.get("group")
+        if not name:
+            return None
+        if name not in self.groups:
+            self.groups[name] = Group.objects.create(name=name)
+        return self.groups[name]
+
+    def create_meetings(self, row):
+        """
+        Create the meeting pages for one spec row, one per day it meets on, and
+        return their ids. Anything the row creates before it fails is rolled back
+        by `import_batch`.
+        """
+        days = row.get("day")
+        days = [int(day) for day in (days if isinstance(days, list) else [days])]
+        start_time = parse_time(row.get("time"))
+        end_time = parse_time(row.get("end_time"))
+        types = [
+            self.types[code] for code in row.get("types") or [] if code in self.types
+        ]
+        name = row.get("name") or ""
+        slug = row.get("slug") or slugify(name)
+
+        location = self.get_location(row)
+        if location.pk not in self.meeting_slugs:
+            self.meeting_slugs[location.pk] = set(
+                location.get_children().values_list("slug", flat=True)
+            )
+        # The slugs are only taken once the row has been imported.
+        taken = set(self.meeting_slugs[location.pk])
+
+        meeting_ids = []
+        for day in days:
+            meeting = Meeting(
+                title=name,
+                slug=unique_slug(
+                    slug if len(days) == 1 else f"{slug}-{day}", taken
+                ),
+                day_of_week=day,
+                start_time=start_time,
+                end_time=end_time,
+                details=row.get("notes") or None,
+                conference_url=row.get("conference_url") or "",
+                conference_phone=row.get("conference_phone") or "",
+                district=row.get("district") or "",
+                paypal=row.get("paypal") or "",
+                venmo=row.get("venmo") or "",
+                group=self.get_group(row),
+                live=True,
+                first_published_at=self.now,
+                last_published_at=self.now,
+            )
+            meeting.types = types
+            location.add_child(instance=meeting)
+            meeting_ids.append(meeting.pk)
+
+        self.meeting_slugs[location.pk] = taken
+        return meeting_ids
+
+    def forget_row(self, row, sizes, stats):
+        """
+        Drop what a row that was rolled back added to the lookup tables, given
+        their sizes and the stats from before the row, and reload the child
+        counts that adding its pages changed in memory.
+        """
+        for name, size in sizes.items():
+            lookup = getattr(self, name)
+            for key in list(lookup)[size:]:
+                if name == "locations":
+                    self.location_slugs.discard(lookup[key].slug)
+                del lookup[key]
+        self.stats.update(stats)
+
+        self.parent.refresh_from_db(fields=["numchild"])
+        address_key = normalize_address((row.get("formatted_address") or "").strip())
+        if address_key in self.locations:
+            self.locations[address_key].refresh_from_db(fields=["numchild"])
+
+    def import_batch(self, rows):
+        """
+        Import a batch of rows in one transaction. Each row is imported in a
+        savepoint, so a row that can't be read or fails validation is rolled back,
+        skipped and reported.
+        """
+        meeting_ids = []
+        with transaction.atomic():
+            for row in rows:
+                sizes = {name: len(getattr(self, name)) for name in IMPORTER_LOOKUPS}
+                stats = dict(self.stats)
+                try:
+                    with transaction.atomic():
+                        meeting_ids += self.create_meetings(row)
+                except (KeyError, TypeError, ValueError, ValidationError) as e:
+                    self.forget_row(row, sizes, stats)
+                    self.stats["skipped"] += 1
+                    self.errors.append(f"{row.get('name') or row}: {e}")
+
+            record_changes(Meeting.objects.filter(pk__in=meeting_ids))
+            schedule_feed_refresh()
+
+        self.stats["meetings"] += len(meeting_ids)
+
+    def run(self, rows):
+        """
+        Import the rows, yielding the running stats after each batch.
+        """
+        started = time.monotonic()
+        rows = iter(rows)
+
+        with deferred_feed_refresh(), deferred_search_indexing(Location, Meeting):
+            while batch := list(islice(rows, self.batch_size)):
+                self.import_batch(batch)
+                self.stats["elapsed"] = time.monotonic() - started
+                yield self.stats
+
+        self.stats["elapsed"] = time.monotonic() - started
@@ -0,0 +1,43 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from meeting_guide.export import EXPORT_FORMATS, iter_csv, iter_json, write_xlsx
+
+
+class Command(BaseCommand):
+    help = "Export the meeting list in the Meeting Guide spec format."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=tuple(EXPORT_FORMATS), default="json"
+        )
+        parser.add_argument(
+            "--output",
+            help="The file to write to; JSON and CSV default to standard output.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="How many meetings to read from the database at a time.",
+        )
+
+    def handle(self, *args, **options):
+        export_format = options["format"]
+        chunk_size = options["chunk_size"]
+
+        if export_format == "xlsx":
+            if not options["output"]:
+                raise CommandError("XLSX exports need an --output file.")
+            try:
+                write_xlsx(options["output"], chunk_size=chunk_size)
+            except ImproperlyConfigured as e:
+                raise CommandError(e)
+            return
+
+        iter_export = iter_json if export_format == "json" else iter_csv
+        if options["output"]:
+            with open(options["output"], "wb") as f:
+                f.writelines(iter_export(chunk_size=chunk_size))
+        else:
+            for chunk in iter_export(chunk_size=chunk_size):
+                self.stdout.write(chunk.decode(), ending="")
@@ -0,0 +1,127 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from meeting_guide.changes import record_changes
+from meeting_guide.feed import schedule_feed_refresh
+from meeting_guide.geocoders import normalize_address
+from meeting_guide.geocoding import geocode_addresses
+from meeting_guide.models import GeocodeCache, Location, Meeting
+
+
+class Command(BaseCommand):
+    help = (
+        "Geocode a batch of addresses, or every Location without coordinates, "
+        "storing the results in the geocode cache. Addresses already cached are "
+        "skipped, so an interrupted run can simply be started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("addresses", nargs="*", help="Addresses to geocode.")
+        parser.add_argument(
+            "--file", help="A file of addresses to geocode, one per line."
+        )
+        parser.add_argument(
+            "--locations",
+            action="store_true",
+            help="Geocode every Location without coordinates, and set them.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="How many requests to run at once."
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="The most requests per second (default: "
+            "WAGTAIL_MEETING_GUIDE_GEOCODE_RATE_LIMIT).",
+        )
+        parser.add_argument(
+            "--max-retries",
+            type=int,
+            default=5,
+            help="How many times to retry an address when the quota is used up.",
+        )
+
+    def handle(self, *args, **options):
+        addresses = list(options["addresses"])
+        if options["file"]:
+            with open(options["file"]) as f:
+                addresses += [line.strip() for line in f if line.strip()]
+
+        locations = {}
+        if options["locations"]:
+            for location in Location.objects.filter(
+                latitude__isnull=True, formatted_address__gt=""
+            ).only("pk", "formatted_address"):
+                locations.setdefault(location.formatted_address, []).append(location)
+            addresses += list(locations)
+
+        if not addresses:
+            raise CommandError("Give some addresses, a --file, or --locations.")
+
+        started = time.monotonic()
+        geocoded = failed = 0
+        coordinates = {}
+        for address, address_components in geocode_addresses(
+            addresses,
+            workers=options["workers"],
+            rate=options["rate"],
+            max_retries=options["max_retries"],
+        ):
+            if "lat" not in address_components:
+                failed += 1
+                self.stderr.write(address_components["problem"].strip())
+                continue
+
+            geocoded += 1
+            coordinates[address] = address_components["lat"], address_components["lng"]
+            if options["verbosity"] > 1:
+                self.stdout.write(
+                    f"{address}: {address_components['formatted_address']}"
+                )
+
+        updated = 0
+        if locations:
+            updated = self.update_locations(locations, coordinates)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Geocoded {geocoded} addresses ({failed} failed) in {elapsed:.1f}s; "
+                f"updated {updated} locations."
+            )
+        )
+
+    def update_locations(self, locations, coordinates):
+        """
+        Set the coordinates of Locations whose addresses were geocoded in this run
+        or are already in the geocode cache, and log the change to their meetings
+        and refresh the feed, as the meetings' coordinates come from them.
+        """
+        keys = {
+            normalize_address(address): address
+            for address in locations
+            if address not in coordinates
+        }
+        for address_key, lat, lng in GeocodeCache.objects.filter(
+            address_key__in=keys, lat__isnull=False, lng__isnull=False
+        ).values_list("address_key", "lat", "lng"):
+            coordinates[keys[address_key]] = (lat, lng)
+
+        updated = []
+        with transaction.atomic():
+            for address, address_locations in locations.items():
+                if address not in coordinates:
+                    continue
+                lat, lng = coordinates[address]
+                for location in address_locations:
+                    location.lat_lng = "SRID=4326;POINT({0} {1})".format(lng, lat)
+                    location.save(clean=False, update_fields=["lat_lng"])
+                    updated.append(location.pk)
+
+            if updated:
+                record_changes(Meeting.objects.filter(meeting_location__in=updated))
+                schedule_feed_refresh()
+
+        return len(updated)
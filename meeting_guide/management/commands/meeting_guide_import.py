@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Page
+
+from meeting_guide.importer import MeetingImporter, get_region_names, read_meetings
+from meeting_guide.models import Region
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a meeting list in the Meeting Guide spec format, as JSON or CSV, "
+        "creating its Location and Meeting pages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The JSON or CSV file to import.")
+        parser.add_argument(
+            "--parent",
+            type=int,
+            required=True,
+            help="The id of the page new Locations are created under.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("json", "csv"),
+            help="The file's format, if its extension doesn't say.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="How many meetings to create in each transaction.",
+        )
+        parser.add_argument(
+            "--geocode",
+            action="store_true",
+            help="Geocode the addresses of locations without coordinates.",
+        )
+        parser.add_argument(
+            "--region-root",
+            type=int,
+            help=(
+                "The id of a region to nest the list's regions under, for lists "
+                "whose meetings have a single, top-level region."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        try:
+            parent = Page.objects.get(pk=options["parent"])
+            region_root = None
+            if options["region_root"] is not None:
+                region_root = Region.objects.get(pk=options["region_root"])
+            rows = read_meetings(options["path"], options["format"])
+        except (Page.DoesNotExist, Region.DoesNotExist, OSError, ValueError) as e:
+            raise CommandError(e)
+
+        if region_root is None and any(
+            len(get_region_names(row)) == 1 for row in rows
+        ):
+            raise CommandError(
+                "Some meetings have only a top-level region, and locations must be "
+                "in a sub-region. Pass --region-root with the id of a region to "
+                "nest the list's regions under."
+            )
+
+        importer = MeetingImporter(
+            parent,
+            batch_size=options["batch_size"],
+            geocode=options["geocode"],
+            region_root=region_root,
+        )
+        for stats in importer.run(rows):
+            if options["verbosity"] > 1:
+                self.stdout.write(
+                    "{meetings} meetings imported in {elapsed:.1f}s".format(**stats)
+                )
+
+        for error in importer.errors:
+            self.stderr.write(f"Skipped {error}")
+
+        stats = importer.stats
+        rate = stats["meetings"] / stats["elapsed"] if stats["elapsed"] else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Imported {meetings} meetings, {locations} new locations and "
+                "{regions} new regions in {elapsed:.1f}s ({rate:.0f} meetings/s); "
+                "skipped {skipped}.".format(rate=rate, **stats)
+            )
+        )
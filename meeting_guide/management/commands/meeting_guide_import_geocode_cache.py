@@ -0,0 +1,92 @@
+import datetime
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from meeting_guide.models import GeocodeCache
+from meeting_guide.utils import geocode_cache_fields, parse_geocode
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the per-address JSON files of the old geocode cache into the "
+        "database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "directory",
+            nargs="?",
+            default="meeting_guide_cache",
+            help="The directory of cached JSON files (default: meeting_guide_cache).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="How many entries to insert at a time.",
+        )
+        parser.add_argument(
+            "--use-file-times",
+            action="store_true",
+            help=(
+                "Date entries by when their files were written, rather than now, "
+                "so older ones are looked up again sooner."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options["directory"])
+        if not directory.is_dir():
+            raise CommandError(f"{directory} is not a directory.")
+
+        # The old cache kept results for good, so by default they are treated as
+        # fetched now rather than expiring as soon as they are imported.
+        now = timezone.now()
+        entries = []
+        skipped = 0
+        for path in sorted(directory.glob("*.json")):
+            try:
+                address_data = json.loads(path.read_text())
+            except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+                skipped += 1
+                continue
+
+            if address_data.get("status") != "OK":
+                skipped += 1
+                continue
+
+            # The file name is the normalized address it was looked up by.
+            address_key = path.stem
+            fetched_at = now
+            if options["use_file_times"]:
+                fetched_at = datetime.datetime.fromtimestamp(
+                    path.stat().st_mtime, tz=datetime.timezone.utc
+                )
+                if not settings.USE_TZ:
+                    fetched_at = timezone.make_naive(fetched_at)
+
+            entries.append(
+                GeocodeCache(
+                    address_key=address_key,
+                    **geocode_cache_fields(
+                        parse_geocode(address_key, address_data), fetched_at
+                    ),
+                )
+            )
+
+        # Entries already in the database are newer, so they are kept.
+        count = GeocodeCache.objects.count()
+        GeocodeCache.objects.bulk_create(
+            entries, batch_size=options["batch_size"], ignore_conflicts=True
+        )
+        created = GeocodeCache.objects.count() - count
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {created} cached addresses, skipped {skipped} files."
+            )
+        )
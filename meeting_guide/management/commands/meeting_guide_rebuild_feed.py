@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from meeting_guide.feed import refresh_feed, refresh_feed_if_dirty
+
+
+class Command(BaseCommand):
+    help = "Regenerate the Meeting Guide feed snapshot served by the API."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--if-dirty",
+            action="store_true",
+            help=(
+                "Only rebuild if there are changes waiting for the feed, and no "
+                "other worker is already rebuilding it."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if not options["if_dirty"]:
+            refresh_feed()
+        elif not refresh_feed_if_dirty():
+            self.stdout.write(
+                "The Meeting Guide feed has no changes waiting, or is already "
+                "being rebuilt."
+            )
+            return
+
+        self.stdout.write(self.style.SUCCESS("Meeting Guide feed snapshot rebuilt."))
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_guide', '0016_alter_group_gso_number_alter_meeting_area'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='meetings', max_length=50, unique=True)),
+                ('content', models.BinaryField()),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_guide', '0017_feedsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedsnapshot',
+            name='etag',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='feedsnapshot',
+            name='last_modified',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_guide', '0018_feedsnapshot_etag_last_modified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedsnapshot',
+            name='content_brotli',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedsnapshot',
+            name='content_gzip',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
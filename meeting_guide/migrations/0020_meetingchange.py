@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_guide', '0019_feedsnapshot_compressed_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meeting_id', models.BigIntegerField()),
+                ('slug', models.SlugField(allow_unicode=True, max_length=255)),
+                ('action', models.CharField(choices=[('updated', 'Updated'), ('deleted', 'Deleted')], default='updated', max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['changed_at'], name='meeting_gui_changed_cf17e4_idx')],
+            },
+        ),
+    ]
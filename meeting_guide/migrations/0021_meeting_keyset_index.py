@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_guide', '0020_meetingchange'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['day_of_week', 'start_time', 'page_ptr'], name='meeting_gui_day_of__f6be96_idx'),
+        ),
+    ]
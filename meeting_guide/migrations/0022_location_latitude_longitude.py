@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:53
+
+from django.db import migrations, models
+from wagtailgeowidget.helpers import geosgeometry_str_to_struct
+
+
+def backfill_latitude_longitude(apps, schema_editor):
+    """
+    Parse every Location's lat_lng into the new numeric columns, in batches.
+    """
+    Location = apps.get_model('meeting_guide', 'Location')
+    batch = []
+
+    for location in Location.objects.only('pk', 'lat_lng').iterator(chunk_size=500):
+        point = geosgeometry_str_to_struct(location.lat_lng) if location.lat_lng else None
+        if not point:
+            continue
+
+        location.latitude = float(point['y'])
+        location.longitude = float(point['x'])
+        batch.append(location)
+
+        if len(batch) >= 500:
+            Location.objects.bulk_update(batch, ['latitude', 'longitude'])
+            batch = []
+
+    Location.objects.bulk_update(batch, ['latitude', 'longitude'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_guide', '0021_meeting_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['latitude', 'longitude'], name='meeting_gui_latitud_425722_idx'),
+        ),
+        migrations.RunPython(
+            backfill_latitude_longitude, migrations.RunPython.noop
+        ),
+    ]
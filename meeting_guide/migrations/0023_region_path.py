@@ -0,0 +1,47 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:56
+
+from django.db import migrations, models
+
+
+def backfill_region_paths(apps, schema_editor):
+    """
+    Materialize every Region's path and ancestor ids, walking the tree in order
+    so parents are always filled in before their children.
+    """
+    Region = apps.get_model('meeting_guide', 'Region')
+    regions = {}
+
+    for region in Region.objects.order_by('tree_id', 'lft'):
+        parent = regions.get(region.parent_id)
+        if parent:
+            region.path = f'{parent.path} > {region.name}'
+            region.ancestor_ids = parent.ancestor_ids + [parent.pk]
+        else:
+            region.path = region.name
+            region.ancestor_ids = []
+        regions[region.pk] = region
+
+    Region.objects.bulk_update(
+        regions.values(), ['path', 'ancestor_ids'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_guide', '0022_location_latitude_longitude'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='region',
+            name='ancestor_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='path',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(backfill_region_paths, migrations.RunPython.noop),
+    ]
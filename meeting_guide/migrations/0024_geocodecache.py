@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_guide', '0023_region_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address_key', models.CharField(max_length=255, unique=True)),
+                ('status', models.CharField(default='OK', max_length=32)),
+                ('formatted_address', models.CharField(blank=True, max_length=255)),
+                ('lat', models.FloatField(blank=True, null=True)),
+                ('lng', models.FloatField(blank=True, null=True)),
+                ('region', models.CharField(blank=True, max_length=255)),
+                ('subregion', models.CharField(blank=True, max_length=255)),
+                ('city', models.CharField(blank=True, max_length=255)),
+                ('components', models.JSONField(blank=True, default=dict)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'geocode cache entry',
+                'verbose_name_plural': 'geocode cache entries',
+            },
+        ),
+    ]
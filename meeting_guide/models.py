@@ -3,6 +3,7 @@ import datetime
 from django.core.validators import MinLengthValidator
 from django.db import models
 from django.forms import CheckboxSelectMultiple
+from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.html import mark_safe
 
@@ -15,6 +16,7 @@ from wagtail.search.index import SearchField
 from wagtailgeowidget.panels import GoogleMapsPanel
 from wagtailgeowidget.helpers import geosgeometry_str_to_struct
 
+from .cache import get_meeting_type_version
 from .validators import (
     CashAppUsernameValidator,
     ConferencePhoneValidator,
@@ -25,21 +27,69 @@ from .validators import (
 
 class Region(MPTTModel):
     """
-    Tree of regions and sub-regions.
+    Tree of regions and sub-regions. Each region keeps its materialized path of
+    ancestor names and ancestor ids, so listings never query ancestors per row.
     """
 
     name = models.CharField(max_length=255)
     parent = TreeForeignKey(
         "self", on_delete=models.CASCADE, null=True, blank=True, related_name="children"
     )
+    path = models.TextField(blank=True, editable=False)
+    ancestor_ids = models.JSONField(default=list, blank=True, editable=False)
 
     def __str__(self):
+        if self.path:
+            return self.path
+
         ancestors = self.get_ancestors(include_self=True).values_list("name", flat=True)
         return " > ".join(ancestors)
 
     class MPTTMeta:
         order_insertion_by = ["name"]
 
+    def set_path(self):
+        """
+        Set this region's path from its parent's.
+        """
+        if self.parent_id:
+            self.path = f"{self.parent.path} > {self.name}"
+            self.ancestor_ids = self.parent.ancestor_ids + [self.parent_id]
+        else:
+            self.path = self.name
+            self.ancestor_ids = []
+
+    def update_descendant_paths(self):
+        """
+        Recompute the paths of every region below this one, with one query to read
+        them and a bulk update to write them.
+        """
+        descendants = list(self.get_descendants().only("pk", "name", "parent_id"))
+        regions = {self.pk: self}
+
+        # Descendants come in tree order, so parents are always seen first.
+        for region in descendants:
+            parent = regions[region.parent_id]
+            region.path = f"{parent.path} > {region.name}"
+            region.ancestor_ids = parent.ancestor_ids + [parent.pk]
+            regions[region.pk] = region
+
+        Region.objects.bulk_update(
+            descendants, ["path", "ancestor_ids"], batch_size=500
+        )
+
+    def save(self, *args, **kwargs):
+        """
+        Keep the materialized paths of this region and its descendants in sync
+        when it is renamed or moved.
+        """
+        previous = (self.path, self.ancestor_ids)
+        self.set_path()
+        super().save(*args, **kwargs)
+
+        if (self.path, self.ancestor_ids) != previous and not self.is_leaf_node():
+            self.update_descendant_paths()
+
 
 class Group(models.Model):
     """
@@ -100,6 +150,8 @@ class Location(Page):
     lat_lng = models.CharField(
         "Latitude/Longitude", max_length=255, blank=True, null=True
     )
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
     postal_code = models.CharField("Postal Code", max_length=12, blank=True)
     details = models.TextField(
         null=True,
@@ -114,11 +166,17 @@ class Location(Page):
 
     @property
     def lat(self):
-        return self.point["y"]
+        # The columns are only filled in on save, so an unsaved location (a page
+        # preview, say) reads its coordinates from `lat_lng`.
+        if self.latitude is None and self.lat_lng and self.point:
+            return float(self.point["y"])
+        return self.latitude
 
     @property
     def lng(self):
-        return self.point["x"]
+        if self.longitude is None and self.lat_lng and self.point:
+            return float(self.point["x"])
+        return self.longitude
 
     content_panels = Page.content_panels + [
         FieldPanel("region"),
@@ -144,8 +202,25 @@ class Location(Page):
         indexes = [
             models.Index(fields=["region"]),
             models.Index(fields=["formatted_address"]),
+            models.Index(fields=["latitude", "longitude"]),
         ]
 
+    def save(self, *args, **kwargs):
+        """
+        Keep the numeric latitude and longitude in sync with `lat_lng`.
+        """
+        point = geosgeometry_str_to_struct(self.lat_lng) if self.lat_lng else None
+        if point:
+            self.latitude, self.longitude = float(point["y"]), float(point["x"])
+        else:
+            self.latitude = self.longitude = None
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "lat_lng" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"latitude", "longitude"}
+
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return "{0}: {1}".format(self.region, self.title)
 
@@ -175,6 +250,26 @@ class MeetingType(models.Model):
         )
 
 
+# The online meeting type, kept for each process with the generation of meeting
+# types it was looked up in.
+online_meeting_type = {}
+
+
+def get_online_meeting_type():
+    """
+    Return the ONL MeetingType, or `None` if there isn't one. It is looked up once
+    per process, and again only after a MeetingType changes.
+    """
+    version = get_meeting_type_version()
+    if online_meeting_type.get("version") != version:
+        online_meeting_type["type"] = MeetingType.objects.filter(
+            spec_code="ONL"
+        ).first()
+        online_meeting_type["version"] = version
+
+    return online_meeting_type["type"]
+
+
 class Meeting(Page):
     """
     Model for storing meeting data.
@@ -328,28 +423,128 @@ class Meeting(Page):
         indexes = [
             models.Index(fields=["meeting_location"]),
             models.Index(fields=["day_of_week"]),
+            models.Index(fields=["day_of_week", "start_time", "page_ptr"]),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember where the stored meeting is and whether it is online, so
+        # saves can skip lookups that would only find the same answer.
+        if "path" in instance.__dict__:
+            instance._saved_path = instance.path
+        if "conference_url" in instance.__dict__:
+            instance._saved_online = bool(instance.conference_url)
+        return instance
+
     def save(self, *args, **kwargs):
         """
         Associate the meeting with the Location parent and save. Then
         automatically assign the ONLINE meeting type if the field is
         populated.
         """
-        # Associate with the parent meeting location, and save in case this
-        # is new, before we change meeting types.
-        self.meeting_location = Location.objects.get(pk=self.get_parent().id)
-
-        # Automagically add or remove the online meeting type.
-        online_meeting_type = MeetingType.objects.get(spec_code="ONL")
-        if self.conference_url:
-            self.types.add(online_meeting_type)
-        else:
-            self.types.remove(online_meeting_type)
+        # Associate with the parent meeting location. A meeting that hasn't
+        # moved since it was loaded already has it; otherwise take it from the
+        # parent page, which add_child and earlier lookups have already cached.
+        if not self.meeting_location_id or self.path != getattr(
+            self, "_saved_path", None
+        ):
+            self.meeting_location_id = self.get_parent().pk
+
+        # Automagically add or remove the online meeting type, touching the
+        # types only when they are already in memory or the meeting has gone
+        # on or offline.
+        online = bool(self.conference_url)
+        online_meeting_type = get_online_meeting_type()
+        types_in_memory = "types" in getattr(self, "_cluster_related_objects", {})
+        if online_meeting_type is not None:
+            if self.page_ptr_id is None and not types_in_memory:
+                # A new meeting has no stored types to load.
+                self.types = [online_meeting_type] if online else []
+            elif types_in_memory or online != getattr(self, "_saved_online", None):
+                if online:
+                    self.types.add(online_meeting_type)
+                else:
+                    self.types.remove(online_meeting_type)
 
         super().save(*args, **kwargs)
+        self._saved_path = self.path
+        self._saved_online = online
 
     def __str__(self):
         return "{0} ({1}): {2} @ {3}".format(
             self.title, self.group, self.day_of_week, self.start_time
         )
+
+
+class FeedSnapshot(models.Model):
+    """
+    Prebuilt, serialized copy of the Meeting Guide feed, regenerated whenever its
+    content changes so the API can serve it without building it per request.
+    """
+
+    MEETINGS = "meetings"
+
+    name = models.CharField(max_length=50, unique=True, default=MEETINGS)
+    content = models.BinaryField()
+    content_gzip = models.BinaryField(null=True, blank=True)
+    content_brotli = models.BinaryField(null=True, blank=True)
+    etag = models.CharField(max_length=64, blank=True)
+    last_modified = models.DateTimeField(null=True, blank=True)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "{0} ({1})".format(self.name, self.generated_at)
+
+
+class MeetingChange(models.Model):
+    """
+    Log of changes to meetings, read by the delta API. The id is the change
+    sequence number that clients use as their sync cursor.
+    """
+
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ACTION_CHOICES = (
+        (UPDATED, "Updated"),
+        (DELETED, "Deleted"),
+    )
+
+    meeting_id = models.BigIntegerField()
+    slug = models.SlugField(max_length=255, allow_unicode=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default=UPDATED)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["changed_at"]),
+        ]
+
+    def __str__(self):
+        return "{0}: {1} {2}".format(self.id, self.slug, self.action)
+
+
+class GeocodeCache(models.Model):
+    """
+    Parsed geocoding results, keyed on the normalized address they were looked up
+    by, and shared by every app node.
+    """
+
+    address_key = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=32, default="OK")
+    formatted_address = models.CharField(max_length=255, blank=True)
+    lat = models.FloatField(null=True, blank=True)
+    lng = models.FloatField(null=True, blank=True)
+    region = models.CharField(max_length=255, blank=True)
+    subregion = models.CharField(max_length=255, blank=True)
+    city = models.CharField(max_length=255, blank=True)
+    components = models.JSONField(default=dict, blank=True)
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "geocode cache entry"
+        verbose_name_plural = "geocode cache entries"
+
+    def __str__(self):
+        return "{0} ({1})".format(self.address_key, self.status)
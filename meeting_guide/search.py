@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save
+from wagtail.search.backends import get_search_backends
+from wagtail.search.signal_handlers import post_save_signal_handler
+
+INDEX_CHUNK_SIZE = 500
+
+
+def update_search_index(model, pks):
+    """
+    Add or update the search index entries for a model's objects in bulk, a chunk
+    at a time.
+    """
+    pks = list(pks)
+    backends = list(get_search_backends(with_auto_update=True))
+
+    for start in range(0, len(pks), INDEX_CHUNK_SIZE):
+        objects = list(
+            model.get_indexed_objects().filter(
+                pk__in=pks[start : start + INDEX_CHUNK_SIZE]
+            )
+        )
+        for backend in backends:
+            backend.add_bulk(model, objects)
+
+
+@contextmanager
+def deferred_search_indexing(*models):
+    """
+    Stop Wagtail indexing each of the models' objects as it is saved, and index
+    everything saved inside the block in bulk when it ends.
+
+    Signal receivers are shared by the whole process, so this is meant for
+    management commands and other bulk jobs rather than web requests.
+    """
+    saved = {}
+
+    def collect(sender, instance, **kwargs):
+        saved[sender].add(instance.pk)
+
+    # Only take over models Wagtail keeps up to date automatically.
+    for model in models:
+        if post_save.disconnect(post_save_signal_handler, sender=model):
+            saved[model] = set()
+            post_save.connect(collect, sender=model, weak=False)
+
+    try:
+        yield
+    finally:
+        for model in saved:
+            post_save.disconnect(collect, sender=model)
+            post_save.connect(post_save_signal_handler, sender=model)
+
+        for model, pks in saved.items():
+            if pks:
+                update_search_index(model, pks)
@@ -20,6 +20,141 @@ def get_meeting_guide_settings():
     return meeting_guide_settings
 
 
+def get_api_streaming():
+    """
+    Whether the API streams the feed straight from the database, rather than
+    serving the prebuilt snapshot.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_API_STREAMING", False)
+
+
+def get_api_chunk_size():
+    """
+    How many meetings are read from the database at a time when streaming.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_API_CHUNK_SIZE", 500)
+
+
+def get_api_json_encoder():
+    """
+    The JSON encoder used to serialize the feed: "auto", "json", "orjson", or the
+    dotted path to a custom encoder class.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_JSON_ENCODER", "auto")
+
+
+def get_cluster_max_zoom():
+    """
+    The highest map zoom level at which locations are grouped into clusters; at
+    higher zoom levels every location is returned on its own.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_CLUSTER_MAX_ZOOM", 13)
+
+
+def get_regions_max_age():
+    """
+    How many seconds clients may cache the region tree before checking it again.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_REGIONS_MAX_AGE", 300)
+
+
+def get_geocode_cache_days():
+    """
+    How many days a geocoded address is cached before it is looked up again, or
+    `None` to keep it for good.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_GEOCODE_CACHE_DAYS", 30)
+
+
+def get_geocode_negative_cache_days():
+    """
+    How many days an address the geocoder found nothing for is remembered, so it
+    isn't looked up again until then.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_GEOCODE_NEGATIVE_CACHE_DAYS", 7)
+
+
+def get_geocode_lru_size():
+    """
+    How many geocoded addresses each process keeps in memory, in front of the
+    database cache.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_GEOCODE_LRU_SIZE", 1000)
+
+
+def get_geocoder_name():
+    """
+    The geocoder used to look addresses up: "google", "gazetteer", or the dotted
+    path to a custom geocoder class.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_GEOCODER", "google")
+
+
+def get_gazetteer_path():
+    """
+    The CSV file of addresses the offline gazetteer geocoder looks up.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_GAZETTEER", None)
+
+
+def get_geocode_url():
+    """
+    The URL of the geocoding API, which can point at a stand-in server for tests.
+    """
+    return getattr(
+        settings,
+        "WAGTAIL_MEETING_GUIDE_GEOCODE_URL",
+        "https://maps.googleapis.com/maps/api/geocode/json",
+    )
+
+
+def get_geocode_timeout():
+    """
+    How many seconds to wait for the geocoding API before giving up.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_GEOCODE_TIMEOUT", 10)
+
+
+def get_geocode_rate_limit():
+    """
+    The most geocoding API requests a batch run makes per second.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_GEOCODE_RATE_LIMIT", 10)
+
+
+def get_feed_refresh_delay():
+    """
+    How many seconds the feed waits for changes to stop before it is rebuilt, so
+    a burst of publishes is rebuilt once. With 0, it is rebuilt as each change
+    commits.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_FEED_REFRESH_DELAY", 0)
+
+
+def get_changes_overlap():
+    """
+    How many seconds of changes from before a sync cursor are sent again, to
+    cover changes that committed after changes with higher sequence numbers.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_CHANGES_OVERLAP", 300)
+
+
+def get_cache_timeout():
+    """
+    How many seconds a cached feed, filtered meeting list, cluster set or region
+    tree is served fresh, unless a change replaces it sooner.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_CACHE_TIMEOUT", 3600 * 24 * 7)
+
+
+def get_cache_stale_timeout():
+    """
+    How many seconds past its freshness a cached entry may still be served while
+    it is rebuilt in the background.
+    """
+    return getattr(settings, "WAGTAIL_MEETING_GUIDE_CACHE_STALE_TIMEOUT", 3600 * 24)
+
+
 def get_print_styles():
     """
     Default options for PDF styling.
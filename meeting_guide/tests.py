@@ -0,0 +1,140 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from wagtail.models import Page
+
+from .changes import get_changes, get_cursor
+from .encoders import get_encoder
+from .feed import build_feed, get_meetings, iter_feed, paginate_meetings
+from .models import Group, Location, Meeting, MeetingType, Region
+
+
+class FeedTestCase(TestCase):
+    """
+    Base class for tests that need meetings in the feed.
+    """
+
+    fixtures = ["spec_meeting_types.json"]
+
+    @classmethod
+    def setUpTestData(cls):
+        county = Region.objects.create(name="County")
+        cls.town = Region.objects.create(name="Town", parent=county)
+        cls.group = Group.objects.create(name="Group", gso_number="123")
+        cls.types = list(MeetingType.objects.filter(spec_code__in=["O", "D", "ONL"]))
+
+    def add_meetings(self, count):
+        """
+        Add `count` meetings, three to a location.
+        """
+        root = Page.objects.get(depth=1)
+        location = None
+        start = Meeting.objects.count()
+        for i in range(start, start + count):
+            if location is None or i % 3 == 0:
+                location = Location(
+                    title=f"Location {i}",
+                    slug=f"location-{i}",
+                    region=self.town,
+                    formatted_address=f"{i} Main St, Philadelphia, PA",
+                    lat_lng="SRID=4326;POINT(-75.1 40.0)",
+                )
+                root.add_child(instance=location)
+
+            meeting = Meeting(
+                title=f"Meeting {i}",
+                slug=f"meeting-{i}",
+                day_of_week=i % 7,
+                start_time=datetime.time(7 + i % 12, 0),
+                end_time=datetime.time(8 + i % 12, 0),
+                group=self.group,
+            )
+            meeting.types = self.types[: 1 + i % len(self.types)]
+            location.add_child(instance=meeting)
+
+
+class BuildFeedQueryCountTests(FeedTestCase):
+    """
+    The feed is built in the same number of queries however many meetings it has.
+    """
+
+    def test_query_count_does_not_grow_with_meetings(self):
+        for count in (10, 100):
+            with self.subTest(meetings=count):
+                self.add_meetings(count - Meeting.objects.count())
+                # The meetings with their locations and groups, their types, and
+                # the region tree.
+                with self.assertNumQueries(3):
+                    feed = build_feed()
+                self.assertEqual(len(feed), count)
+
+
+class IterFeedTests(FeedTestCase):
+    """
+    The feed streamed a chunk at a time is the same as the feed built at once.
+    """
+
+    def test_chunked_feed_matches_whole_feed(self):
+        self.add_meetings(7)
+        self.assertEqual(
+            b"".join(iter_feed(chunk_size=2)), get_encoder().dumps(build_feed())
+        )
+
+    def test_empty_feed(self):
+        self.assertEqual(b"".join(iter_feed(chunk_size=2)), b"[]")
+
+
+class PaginateMeetingsTests(FeedTestCase):
+    """
+    Walking the pages of meetings visits every meeting once, in the feed's order.
+    """
+
+    def test_pages_follow_feed_order(self):
+        self.add_meetings(20)
+        # Meetings without a start time sort with the others of their day.
+        Meeting.objects.filter(slug__in=["meeting-3", "meeting-10"]).update(
+            start_time=None
+        )
+
+        slugs = []
+        after = None
+        while True:
+            page, after = paginate_meetings(get_meetings(), 2, after)
+            slugs += [meeting["slug"] for meeting in build_feed(page)]
+            if after is None:
+                break
+
+        self.assertEqual(slugs, [meeting["slug"] for meeting in build_feed()])
+
+
+@override_settings(WAGTAIL_MEETING_GUIDE_CHANGES_OVERLAP=0)
+class GetChangesTests(FeedTestCase):
+    """
+    Meetings that leave the feed, or its old slug when a meeting is renamed, are
+    reported as deleted. The overlap is turned off so that the changes made in
+    setting up are not sent again.
+    """
+
+    def setUp(self):
+        self.add_meetings(3)
+        self.cursor = get_cursor()
+
+    def test_unpublished_meeting_is_deleted(self):
+        Meeting.objects.get(slug="meeting-0").unpublish()
+
+        changes = get_changes(self.cursor)
+        self.assertEqual(changes["deleted"], ["meeting-0"])
+        self.assertNotIn(
+            "meeting-0", [meeting["slug"] for meeting in changes["meetings"]]
+        )
+
+    def test_renamed_meeting_is_deleted(self):
+        meeting = Meeting.objects.get(slug="meeting-1")
+        meeting.slug = "renamed"
+        # Wagtail reports the slug change once the publish commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            meeting.save_revision().publish()
+
+        changes = get_changes(self.cursor)
+        self.assertEqual(changes["deleted"], ["meeting-1"])
+        self.assertIn("renamed", [meeting["slug"] for meeting in changes["meetings"]])
@@ -1,10 +1,21 @@
 from django.urls import path
 
-from .views import MeetingsHomeView, MeetingsAPIView
+from .views import (
+    LocationMapAPIView,
+    MeetingsHomeView,
+    MeetingsAPIView,
+    MeetingChangesAPIView,
+    MeetingsNearAPIView,
+    RegionTreeAPIView,
+)
 
 app_name = "meeting-guide"
 
 urlpatterns = [
     path("", MeetingsHomeView.as_view(), name="home"),
     path("api/", MeetingsAPIView.as_view(), name="api"),
+    path("api/changes/", MeetingChangesAPIView.as_view(), name="api-changes"),
+    path("api/near/", MeetingsNearAPIView.as_view(), name="api-near"),
+    path("api/locations/", LocationMapAPIView.as_view(), name="api-locations"),
+    path("api/regions/", RegionTreeAPIView.as_view(), name="api-regions"),
 ]
@@ -1,79 +1,63 @@
-import json
-import os
-import re
-import requests
+import datetime
 
-from django.core.files import File
-from django.conf import settings
+from django.utils import timezone
 
-from meeting_guide.models import Region
+from meeting_guide.cache import (
+    REGION_VERSION_KEY,
+    LRUCache,
+    cached_build,
+    get_region_cache_key,
+)
+from meeting_guide.geocoders import get_geocoder, normalize_address
+from meeting_guide.models import GeocodeCache, Region
+from meeting_guide.settings import (
+    get_geocode_cache_days,
+    get_geocode_lru_size,
+    get_geocode_negative_cache_days,
+)
 
+# Geocoder statuses worth caching: an address that was found, or one that doesn't
+# exist. Anything else is an error, and the address is tried again next time.
+CACHED_STATUSES = ("OK", "ZERO_RESULTS")
 
-def get_geocode_address(full_address):
-    """
-    Given a full address, get the Google address information. Use a local cache.
+# Recently geocoded addresses, as `(address_components, status, fetched_at)`.
+geocode_lru = LRUCache(get_geocode_lru_size())
 
-    Returns `None` if Google doesn't return an address.
-    """
 
+def parse_geocode(full_address, address_data):
+    """
+    Pick the address components we use out of a Google Geocoding API response.
+    """
+    status = address_data.get("status")
     address_components = {}
     address_components["problem"] = "OK"
-
-    cache_filename = (
-        "meeting_guide_cache/"
-        + re.sub("[^0-9a-zA-Z]+", "", full_address.lower().lstrip(" "))
-        + ".json"
-    )
-
-    address_components["cache_status"] = "MISS"
-
-    if os.path.isfile(cache_filename):
-        # grab the json from the cache
-        with open(cache_filename, "r") as f:
-            django_file = File(f)
-            cached_json = django_file.read()
-
-        try:
-            # JSON is valid
-            address_data = json.loads(cached_json)
-            address_components["cache_status"] = "HIT"
-        except json.JSONDecodeError:
-            # Invalid JSON, delete the file, get on next run
-            os.remove(cache_filename)
-            address_components["cache_status"] = "INVALID"
-
-    if address_components["cache_status"] != "HIT":
-        payload = {
-            "bounds": settings.GOOGLE_MAPS_API_BOUNDS,
-            "key": settings.GOOGLE_MAPS_V3_APIKEY,
-            "address": full_address.lstrip(" ").replace("'", ""),
-        }
-        # payload = {'key': API_KEY, 'address': full_address.lstrip(' ')}
-        api_request_url = "https://maps.googleapis.com/maps/api/geocode/json"
-
-        # Send the request to Google Maps
-        r = requests.get(api_request_url, params=payload)
-        address_data = r.json()
-
-        # Write cache file if status == OK
-        if address_data["status"] == "OK":
-            with open(cache_filename, "w") as f:
-                django_file = File(f)
-                json.dump(address_data, django_file, indent=4, separators=(",", ": "))
+    address_components["status"] = status
 
     # We have the data in 'address_data', let's do something with
     # each address and the associated meeting information.
     # Test to see if LOCATION address exists. If so, return the id from MySQL
-    if address_data["status"] == "ZERO_RESULTS":
+    if status == "OK" and not address_data.get("results"):
+        # Nothing found, however the geocoder put it.
+        status = address_components["status"] = "ZERO_RESULTS"
+
+    if status == "ZERO_RESULTS":
         address_components[
             "problem"
         ] = 'Google returned "ZERO_RESULTS" for address {0}:\n{1}\n\n.'.format(
             full_address, address_components
         )
-    elif address_data["status"] == "OVER_QUERY_LIMIT":
+    elif status == "OVER_QUERY_LIMIT":
         address_components[
             "problem"
         ] = 'Google returned "OVER_QUERY_LIMIT"; have we hit the API too much?'
+    elif status != "OK":
+        # REQUEST_DENIED, INVALID_REQUEST, UNKNOWN_ERROR and the like have no
+        # results to read.
+        address_components[
+            "problem"
+        ] = 'Google returned "{0}" for address {1}.'.format(status, full_address)
+        if address_data.get("error_message"):
+            address_components["problem"] += " " + address_data["error_message"]
     else:
         address_components["formatted_address"] = address_data["results"][0][
             "formatted_address"
@@ -167,16 +151,128 @@ def get_geocode_address(full_address):
     return address_components
 
 
+def geocode_cache_fields(address_components, fetched_at=None):
+    """
+    The GeocodeCache field values for parsed address components.
+    """
+    return {
+        "status": address_components.get("status", "OK"),
+        "formatted_address": address_components.get("formatted_address", ""),
+        "lat": address_components.get("lat"),
+        "lng": address_components.get("lng"),
+        "region": address_components.get("region", ""),
+        "subregion": address_components.get("subregion", ""),
+        "city": address_components.get("city", ""),
+        "components": address_components,
+        "fetched_at": fetched_at or timezone.now(),
+    }
+
+
+def cache_geocode(address_key, address_components, fetched_at=None):
+    """
+    Store the parsed components for an address, or the fact that there is no
+    such address, in the geocode cache.
+    """
+    GeocodeCache.objects.update_or_create(
+        address_key=address_key,
+        defaults=geocode_cache_fields(address_components, fetched_at),
+    )
+
+
+def geocode_expired(fetched_at, status="OK"):
+    """
+    Whether a cached geocoding result is older than the cache allows. Addresses
+    the geocoder found nothing for are kept for a shorter time.
+    """
+    if status == "ZERO_RESULTS":
+        max_age = get_geocode_negative_cache_days()
+    else:
+        max_age = get_geocode_cache_days()
+
+    return max_age is not None and fetched_at <= timezone.now() - datetime.timedelta(
+        days=max_age
+    )
+
+
+def get_geocode_address(full_address, session=None):
+    """
+    Given a full address, get the Google address information from the configured
+    geocoder. Pass a `requests.Session` to reuse its pooled connections.
+
+    Results from remote geocoders are cached in two levels: a per-process LRU of
+    recently used addresses, in front of the database cache shared by every
+    process. Addresses are looked up again after
+    `WAGTAIL_MEETING_GUIDE_GEOCODE_CACHE_DAYS`, or after
+    `WAGTAIL_MEETING_GUIDE_GEOCODE_NEGATIVE_CACHE_DAYS` if nothing was found for
+    them.
+
+    Returns `None` if Google doesn't return an address.
+    """
+    geocoder = get_geocoder()
+    if not geocoder.cacheable:
+        address_components = parse_geocode(
+            full_address, geocoder.geocode(full_address, session)
+        )
+        address_components["cache_status"] = "BYPASS"
+        return address_components
+
+    address_key = normalize_address(full_address)
+
+    entry = geocode_lru.get(address_key)
+    if entry is not None:
+        components, status, fetched_at = entry
+        if not geocode_expired(fetched_at, status):
+            return dict(components, cache_status="LRU")
+
+    cached = GeocodeCache.objects.filter(address_key=address_key).first()
+
+    if cached is not None and not geocode_expired(cached.fetched_at, cached.status):
+        geocode_lru.set(
+            address_key, (cached.components, cached.status, cached.fetched_at)
+        )
+        return dict(cached.components, cache_status="HIT")
+
+    address_data = geocoder.geocode(full_address, session)
+
+    if (
+        address_data.get("status") != "OK"
+        and cached is not None
+        and cached.status == "OK"
+    ):
+        # Keep serving the old result rather than losing it to a failed refresh.
+        return dict(cached.components, cache_status="STALE")
+
+    address_components = parse_geocode(full_address, address_data)
+
+    # Cache addresses that were found, and those that definitely don't exist, but
+    # not errors such as a used up quota.
+    if address_components["status"] in CACHED_STATUSES:
+        fetched_at = timezone.now()
+        cache_geocode(address_key, address_components, fetched_at)
+        geocode_lru.set(
+            address_key,
+            (dict(address_components), address_components["status"], fetched_at),
+        )
+
+    address_components["cache_status"] = "EXPIRED" if cached else "MISS"
+
+    return address_components
+
+
 def build_tree(regions):
-    """ Build up our regions recursively """
+    """
+    Build up our regions recursively. Children are read from the nodes' cached
+    children, so no queries are made.
+    """
     items = []
     for r in regions:
-        item = {"label": r.name, "value": r.id, "children": []}
-
-        if r.children.count():
-            item["children"] = build_tree(r.children.all())
-
-        items.append(item)
+        items.append(
+            {
+                "label": r.name,
+                "value": r.id,
+                "children": build_tree(r.get_children()),
+            }
+        )
 
     return items
 
@@ -186,8 +282,14 @@ def get_region_tree():
     Generate deeply nested region data for use by react-dropdown-tree-select
     This returns a nested structure of lists and dicts of regions with their
     names, ids, and children.
+
+    The whole tree is read with one query in tree order, and cached until a Region
+    next changes.
     """
-    top_regions = Region.objects.filter(parent__isnull=True).prefetch_related(
-        "children"
-    )
-    return build_tree(top_regions)
+    def build():
+        top_regions = Region.objects.only(
+            "name", "parent", "tree_id", "lft", "rght", "level"
+        ).get_cached_trees()
+        return build_tree(top_regions)
+
+    return cached_build(get_region_cache_key("tree"), build, REGION_VERSION_KEY)
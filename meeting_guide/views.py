@@ -1,23 +1,69 @@
-import datetime
+import gzip
+import hashlib
 import json
-import re
+import tempfile
 
-from django.conf import settings
-from django.http import HttpResponse
-from django.utils.decorators import method_decorator
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+from django.utils.text import compress_sequence
 from django.views.decorators.cache import cache_page
-from django.views.decorators.gzip import gzip_page
 from django.views.generic import TemplateView
 
-from .models import Meeting, MeetingType, Region
-from .settings import get_meeting_guide_settings
+from .cache import (
+    FEED_VERSION_KEY,
+    REGION_VERSION_KEY,
+    cached_build,
+    get_feed_cache_key,
+    get_feed_version,
+    get_region_cache_key,
+)
+from .changes import get_changes
+from .encoders import get_encoder
+from .feed import (
+    encode_cursor,
+    filter_meetings,
+    get_cached_snapshot,
+    get_meetings,
+    iter_feed,
+    iter_meeting_dicts,
+    paginate_meetings,
+)
+from .export import EXPORT_FORMATS, iter_csv, iter_json, openpyxl, write_xlsx
+from .forms import (
+    LocationMapForm,
+    MeetingChangesForm,
+    MeetingFilterForm,
+    MeetingsNearForm,
+)
+from .geo import get_location_features, get_meetings_near
+from .settings import (
+    get_api_streaming,
+    get_meeting_guide_settings,
+    get_regions_max_age,
+)
+from .utils import get_region_tree
 
 
-@method_decorator(
-    cache_page(3600 * 24 * 7, key_prefix="wagtail_meeting_guide_api_cache"),
-    name='dispatch',
-)
 class MeetingsBaseView(TemplateView):
+    """
+    Base class for views of the meeting list. Their responses are cached for
+    `cache_timeout` seconds under the current feed version, so a change to the
+    meetings clears them. Views that cache their own content set it to `None`.
+    """
+
+    cache_timeout = 3600 * 24 * 7
+
     DAY_OF_WEEK = (
         (0, "Sunday"),
         (1, "Monday"),
@@ -28,15 +74,87 @@ class MeetingsBaseView(TemplateView):
         (6, "Saturday"),
     )
 
+    def dispatch(self, request, *args, **kwargs):
+        if self.cache_timeout is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        key_prefix = get_feed_cache_key("page", get_feed_version())
+        return cache_page(self.cache_timeout, key_prefix=key_prefix)(
+            super().dispatch
+        )(request, *args, **kwargs)
+
     def get_meetings(self):
-        return (
-            Meeting.objects.live().filter(
-                status=Meeting.ACTIVE,
-            ).select_related("meeting_location", "group").prefetch_related(
-                "meeting_location__region",
-                # 'types',  # ParentalManyToManyField instead of ManyToManyField causes Django to throw up on this
-            ).order_by("day_of_week", "start_time")
-        )
+        return get_meetings()
+
+
+def get_accepted_encoding(request, encodings):
+    """
+    Return the first of `encodings` the client accepts, by its Accept-Encoding
+    header, or `None` if the response should not be compressed.
+    """
+    accepted = {}
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+
+    return None
+
+
+def json_response(request, content, etag, last_modified=None, encoding=None):
+    """
+    Return prebuilt JSON content with its validators, or a 304 if the client's
+    conditional request shows it already has it.
+    """
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(content, content_type="application/json")
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    patch_vary_headers(response, ("Accept-Encoding",))
+
+    return response
+
+
+def build_json_entry(content):
+    """
+    The cache entry for prebuilt JSON content: the content, its hash for the
+    ETag, and a gzip copy, so the content is compressed once rather than per
+    response.
+    """
+    return (
+        content,
+        hashlib.sha256(content).hexdigest(),
+        gzip.compress(content, compresslevel=9, mtime=0),
+    )
+
+
+def cached_json_response(request, entry):
+    """
+    Return a cache entry from `build_json_entry`, gzipped if the client accepts
+    it. The gzipped copy is a different representation, so gets its own ETag.
+    """
+    content, etag, content_gzip = entry
+    if get_accepted_encoding(request, ["gzip"]):
+        return json_response(request, content_gzip, f'"{etag}-gzip"', encoding="gzip")
+    return json_response(request, content, f'"{etag}"')
 
 
 class MeetingsHomeView(TemplateView):
@@ -56,72 +174,237 @@ class MeetingsHomeView(TemplateView):
         return context
 
 
-@method_decorator(gzip_page, name="dispatch")
 class MeetingsAPIView(MeetingsBaseView):
     """
-    Return a JSON response of the meeting list.
+    Return a JSON response of the meeting list. The response is the prebuilt feed
+    snapshot, kept in each process for the current feed version, so requests
+    never build the feed themselves. The snapshot is compressed once per version, so responses
+    only pick the variant the client accepts. Conditional requests are answered
+    with a 304 when the client already has the current snapshot.
+
+    The `day`, `region`, `types`, `group` and `updated_since` query parameters
+    narrow the list down; each combination of them is cached separately. With a
+    `limit`, meetings are returned a page at a time, with a `next` link to the
+    following page.
+
+    With `WAGTAIL_MEETING_GUIDE_API_STREAMING` enabled, the feed is instead
+    streamed straight from the database in chunks, with the same output, and
+    gzipped as it is streamed.
     """
 
+    cache_timeout = None
+
     def get(self, request, *args, **kwargs):
-        meetings = self.get_meetings()
-        meetings_dict = []
+        form = MeetingFilterForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
 
-        # Eager load all regions to reference below.
-        regions = Region.objects.all().prefetch_related("children")
+        filters = form.get_filters()
+        limit = form.cleaned_data["limit"]
+        meetings = filter_meetings(self.get_meetings(), **filters)
 
-        for meeting in meetings:
-            meeting_types = list(
-                meeting.types.values_list("spec_code", flat=True)
-            )
+        if get_api_streaming() and not limit:
+            content = iter_feed(meetings)
+            encoding = get_accepted_encoding(request, ["gzip"])
+            if encoding:
+                content = compress_sequence(content)
+            response = StreamingHttpResponse(content, content_type="application/json")
+            if encoding:
+                response["Content-Encoding"] = encoding
+            patch_vary_headers(response, ("Accept-Encoding",))
+            return response
+
+        if filters or limit:
+
+            def build():
+                if limit:
+                    content = self.get_page(
+                        request, meetings, limit, form.cleaned_data["after"]
+                    )
+                else:
+                    content = b"".join(iter_feed(meetings))
+                return build_json_entry(content)
 
-            group_info = ""
-            if len(meeting.district):
-                location = f"{meeting.meeting_location.title} (D{meeting.district})"
-                group_info = f"D{meeting.district}"
-            else:
-                location = meeting.meeting_location.title
-
-            gso_number = getattr(meeting.group, "gso_number", None)
-            if gso_number and len(gso_number):
-                group_info += f" / GSO #{gso_number}"
-
-            region_ancestors = list(
-                regions.get(id=meeting.meeting_location.region.id)
-                .get_ancestors(include_self=True)
-                .values_list("name", flat=True)
+            entry = cached_build(
+                get_feed_cache_key("meetings", form.get_cache_key()),
+                build,
+                FEED_VERSION_KEY,
             )
+            return cached_json_response(request, entry)
+
+        snapshot = get_cached_snapshot()
+
+        # Variants in order of preference; brotli is only there when installed.
+        variants = {}
+        if snapshot.content_brotli is not None:
+            variants["br"] = snapshot.content_brotli
+        variants["gzip"] = snapshot.content_gzip
+        encoding = get_accepted_encoding(request, variants)
+
+        # Each encoding is a different representation, so gets its own strong ETag.
+        return json_response(
+            request,
+            variants[encoding] if encoding else snapshot.content,
+            f'"{snapshot.etag}-{encoding}"' if encoding else f'"{snapshot.etag}"',
+            snapshot.last_modified,
+            encoding,
+        )
+
+    def get_page(self, request, meetings, limit, after):
+        """
+        Serialize one page of meetings, with the URL of the next page if there is
+        one.
+        """
+        meetings, next_key = paginate_meetings(meetings, limit, after)
+
+        next_url = None
+        if next_key is not None:
+            query = request.GET.copy()
+            query["after"] = encode_cursor(next_key)
+            next_url = f"{request.path}?{query.urlencode()}"
+
+        return get_encoder().dumps(
+            {"meetings": list(iter_meeting_dicts(meetings)), "next": next_url}
+        )
+
+
+class MeetingChangesAPIView(MeetingsBaseView):
+    """
+    Return the meetings created or changed since the `since` cursor, tombstones
+    for the slugs of meetings that have left the feed since then, and the cursor
+    to pass next time. Without a cursor, every meeting is returned.
+    """
+
+    cache_timeout = None
+
+    def get(self, request, *args, **kwargs):
+        form = MeetingChangesForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        changes = get_changes(form.cleaned_data["since"])
+
+        return HttpResponse(
+            get_encoder().dumps(changes), content_type="application/json"
+        )
+
+
+class MeetingsNearAPIView(MeetingsBaseView):
+    """
+    Return the meetings within `radius` miles of `lat`, `lng`, nearest first, with
+    their distance. `day` and `time` narrow them down to meetings on those days
+    and starting at or after that time.
+    """
+
+    cache_timeout = None
+
+    def get(self, request, *args, **kwargs):
+        form = MeetingsNearForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        meetings = filter_meetings(self.get_meetings(), day=form.cleaned_data["day"])
+        if form.cleaned_data["time"]:
+            meetings = meetings.filter(start_time__gte=form.cleaned_data["time"])
+
+        nearby = get_meetings_near(
+            form.cleaned_data["lat"],
+            form.cleaned_data["lng"],
+            form.cleaned_data["radius"],
+            meetings,
+        )
+
+        return HttpResponse(
+            get_encoder().dumps(nearby), content_type="application/json"
+        )
+
+
+class LocationMapAPIView(MeetingsBaseView):
+    """
+    Return a GeoJSON FeatureCollection of the locations inside the `bbox` for a map
+    at `zoom`. At low zoom levels nearby locations are grouped into clusters with
+    counts, so the map never has to plot every location at once.
+    """
+
+    cache_timeout = None
+
+    def get(self, request, *args, **kwargs):
+        form = LocationMapForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        features = get_location_features(
+            form.cleaned_data["zoom"], form.cleaned_data["bbox"]
+        )
+
+        return HttpResponse(
+            get_encoder().dumps(features), content_type="application/geo+json"
+        )
+
+
+class RegionTreeAPIView(MeetingsBaseView):
+    """
+    Return the nested region tree, as used by the region dropdown. It is cached
+    until a Region next changes, and clients may cache it for
+    `WAGTAIL_MEETING_GUIDE_REGIONS_MAX_AGE` seconds, then revalidate it with its
+    ETag.
+    """
+
+    cache_timeout = None
+
+    def get(self, request, *args, **kwargs):
+        def build():
+            return build_json_entry(get_encoder().dumps(get_region_tree()))
+
+        entry = cached_build(get_region_cache_key("json"), build, REGION_VERSION_KEY)
+        response = cached_json_response(request, entry)
+        patch_cache_control(response, public=True, max_age=get_regions_max_age())
+
+        return response
+
+
+class MeetingsExportView(TemplateView):
+    """
+    Admin page linking to the meeting list downloads.
+    """
+
+    template_name = "meeting_guide/admin/export.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["formats"] = [
+            export_format
+            for export_format in EXPORT_FORMATS
+            if export_format != "xlsx" or openpyxl is not None
+        ]
+
+        return context
+
+
+def export_meetings(request, export_format):
+    """
+    Download the meeting list in the Meeting Guide spec format as JSON, CSV or
+    XLSX. JSON and CSV are streamed straight from the database; XLSX is written to
+    a temporary file first, as a zip file can't be streamed as it is written.
+    """
+    if export_format not in EXPORT_FORMATS or (
+        export_format == "xlsx" and openpyxl is None
+    ):
+        raise Http404
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"meetings.{extension}"
+
+    if export_format == "xlsx":
+        output = tempfile.TemporaryFile()
+        write_xlsx(output)
+        output.seek(0)
+        return FileResponse(
+            output, as_attachment=True, filename=filename, content_type=content_type
+        )
+
+    iter_export = iter_json if export_format == "json" else iter_csv
+    response = StreamingHttpResponse(iter_export(), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
-            notes = meeting.details
-
-            meeting_dict = {
-                "name": meeting.title,
-                "slug": meeting.slug,
-                "notes": notes,
-                "updated": f"{meeting.last_published_at if meeting.last_published_at else datetime.datetime.now():%Y-%m-%d %H:%M:%S}",
-                "url": f"{settings.BASE_URL}/meetings/?meeting={meeting.slug}",
-                "day": meeting.day_of_week,
-                "time": f"{meeting.start_time:%H:%M}",
-                "end_time": f"{meeting.end_time:%H:%M}",
-                "conference_url": meeting.conference_url,
-                "conference_phone": meeting.conference_phone,
-                "types": meeting_types,
-                "location": location,
-                "formatted_address": meeting.meeting_location.formatted_address,
-                "latitude": meeting.meeting_location.lat,
-                "longitude": meeting.meeting_location.lng,
-                "regions": region_ancestors,
-                "group": group_info,
-            }
-
-            if len(meeting.paypal):
-                meeting_dict["paypal"] = meeting.paypal
-
-            if len(meeting.venmo):
-                meeting_dict["venmo"] = meeting.venmo
-
-            if "feedback_url" in settings.MEETING_GUIDE:
-                meeting_dict["feedback_url"] = settings.MEETING_GUIDE["feedback_url"]
-
-            meetings_dict.append(meeting_dict)
-
-        return HttpResponse(json.dumps(meetings_dict), content_type="application/json")
+    return response
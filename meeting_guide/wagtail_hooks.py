@@ -1,24 +1,152 @@
-from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.urls import path, reverse
 from django_filters import ModelChoiceFilter
 
+from wagtail import hooks
 from wagtail.admin.filters import WagtailFilterSet
-from wagtail.signals import page_published
+from wagtail.admin.menu import MenuItem
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup
 
-from .models import Group, GroupContribution, MeetingType, Region, Location, Meeting
+from .bulk_actions import (
+    AddTypeBulkAction,
+    MoveToLocationBulkAction,
+    RemoveTypeBulkAction,
+    SetDistrictBulkAction,
+    SetStatusBulkAction,
+)
+from .cache import bump_meeting_type_version, bump_region_version, on_commit_once
+from .changes import get_affected_meetings, record_change, record_changes
+from .feed import schedule_feed_refresh
+from .models import (
+    Group,
+    GroupContribution,
+    MeetingChange,
+    MeetingType,
+    Region,
+    Location,
+    Meeting,
+)
+from .views import MeetingsExportView, export_meetings
+
+
+def meeting_moved(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    """
+    Point a meeting moved to another Location at it. Wagtail saves moved pages as
+    plain Pages, so `Meeting.save` doesn't see the move.
+    """
+    if parent_page_after.pk != parent_page_before.pk:
+        Meeting.objects.filter(pk=instance.pk).update(
+            meeting_location_id=parent_page_after.pk
+        )
+
+
+# Connected first, so the feed and change log see the new Location.
+post_page_move.connect(meeting_moved, sender=Meeting)
 
 
 def receiver(sender, **kwargs):
     """
-    Clear the API cache whenever a Location or Meeting is published.
+    Regenerate the feed snapshot whenever anything that appears in the feed
+    changes, and move every worker on to the new feed version.
+    """
+    schedule_feed_refresh()
+
+
+# Register the signal receivers for Location and Meeting page changes.
+for page_model in (Location, Meeting):
+    page_published.connect(receiver, sender=page_model)
+    page_unpublished.connect(receiver, sender=page_model)
+    post_page_move.connect(receiver, sender=page_model)
+    post_delete.connect(receiver, sender=page_model)
+
+# Register the signal receivers for the snippets the feed is built from.
+for snippet_model in (Region, MeetingType, Group):
+    post_save.connect(receiver, sender=snippet_model)
+    post_delete.connect(receiver, sender=snippet_model)
+
+
+def region_receiver(sender, **kwargs):
+    """
+    Move the cached region tree on to a new version once a Region change commits,
+    once however many regions the transaction changed.
     """
-    cache.delete("wagtail_meeting_guide_api_cache")
+    on_commit_once(bump_region_version)
 
 
-# Register the signal receive for Location and Meeting publishes.
-page_published.connect(receiver, sender=Location)
-page_published.connect(receiver, sender=Meeting)
+# Register the signal receivers for the region tree.
+post_save.connect(region_receiver, sender=Region)
+post_delete.connect(region_receiver, sender=Region)
+
+
+def meeting_type_receiver(sender, **kwargs):
+    """
+    Have every worker look up the online meeting type again once a MeetingType
+    change commits.
+    """
+    on_commit_once(bump_meeting_type_version)
+
+
+post_save.connect(meeting_type_receiver, sender=MeetingType)
+post_delete.connect(meeting_type_receiver, sender=MeetingType)
+
+
+def meeting_published(sender, instance, **kwargs):
+    """
+    Log a published meeting for the delta API. Publishing a meeting as inactive
+    takes it out of the feed.
+    """
+    if instance.status == Meeting.INACTIVE:
+        record_change(instance, MeetingChange.DELETED)
+    else:
+        record_change(instance)
+
+
+def meeting_changed(sender, instance, **kwargs):
+    """
+    Log a moved meeting for the delta API.
+    """
+    record_change(instance)
+
+
+def meeting_removed(sender, instance, **kwargs):
+    """
+    Log an unpublished or deleted meeting for the delta API.
+    """
+    record_change(instance, MeetingChange.DELETED)
+
+
+def meeting_slug_changed(sender, instance, instance_before, **kwargs):
+    """
+    Tombstone a meeting's old slug, which clients know it by.
+    """
+    record_change(instance_before, MeetingChange.DELETED)
+
+
+def related_changed(sender, instance, **kwargs):
+    """
+    Log a change to every meeting shown with a Location or snippet that changed.
+    """
+    record_changes(get_affected_meetings(instance))
+
+
+# Register the signal receivers for the delta API's change log.
+page_published.connect(meeting_published, sender=Meeting)
+page_unpublished.connect(meeting_removed, sender=Meeting)
+post_delete.connect(meeting_removed, sender=Meeting)
+post_page_move.connect(meeting_changed, sender=Meeting)
+page_slug_changed.connect(meeting_slug_changed, sender=Meeting)
+for signal in (page_published, page_unpublished, post_page_move):
+    signal.connect(related_changed, sender=Location)
+for snippet_model in (Region, MeetingType, Group):
+    post_save.connect(related_changed, sender=snippet_model)
+    pre_delete.connect(related_changed, sender=snippet_model)
 
 
 class RegionFilter(WagtailFilterSet):
@@ -55,6 +183,9 @@ class RegionAdmin(SnippetViewSet):
     ordering = ("parent", "name")
     filterset_class = RegionFilter
 
+    def get_queryset(self, request):
+        return Region.objects.select_related("parent")
+
 
 class GroupAdmin(SnippetViewSet):
     model = Group
@@ -83,3 +214,37 @@ class MeetingGuideAdminGroup(SnippetViewSetGroup):
 
 
 register_snippet(MeetingGuideAdminGroup)
+
+
+@hooks.register("register_admin_urls")
+def register_export_urls():
+    return [
+        path(
+            "meeting-guide/export/",
+            MeetingsExportView.as_view(),
+            name="meeting_guide_export",
+        ),
+        path(
+            "meeting-guide/export/<str:export_format>/",
+            export_meetings,
+            name="meeting_guide_export_download",
+        ),
+    ]
+
+
+@hooks.register("register_reports_menu_item")
+def register_export_menu_item():
+    return MenuItem(
+        "Meeting Export", reverse("meeting_guide_export"), icon_name="download"
+    )
+
+
+# Register the bulk actions for Meeting pages.
+for action_class in (
+    SetStatusBulkAction,
+    AddTypeBulkAction,
+    RemoveTypeBulkAction,
+    MoveToLocationBulkAction,
+    SetDistrictBulkAction,
+):
+    hooks.register("register_bulk_action", action_class)
@@ -23,6 +23,11 @@ setup(
         "wagtailgeowidget>6",
         "django-mptt",
     ],
+    extras_require={
+        "brotli": ["brotli"],
+        "orjson": ["orjson"],
+        "xlsx": ["openpyxl"],
+    },
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Environment :: Web Environment",